@@ -1,69 +1,508 @@
 import os
 import io
-import base64
+import contextlib
+import json
 import datetime
+import functools
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 import pandas as pd
-import matplotlib
-matplotlib.use('Agg')
-import matplotlib.pyplot as plt
-from flask import Flask, render_template, request, redirect, url_for, flash
+from flask import (Flask, render_template, stream_template, make_response, request, redirect, url_for, flash, g,
+                   get_flashed_messages, session, send_file, abort, has_request_context)
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event, insert, inspect
+from sqlalchemy.engine import make_url
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import joinedload, selectinload, raiseload
 from flask_login import LoginManager, login_user, login_required, logout_user, UserMixin, current_user
 from werkzeug.security import generate_password_hash, check_password_hash
+from werkzeug.middleware.proxy_fix import ProxyFix
+from cachetools import TTLCache
 
 # Logic Imports
-from stock import Stock
+from stock import download_batch, cached_price, cached_quote, get_cached_stock, peek_cached_stock
 from stockportfolio import StockPortfolio
-from visuals import StockVisuals, PortfolioVisuals
+
+
+def _sqlite_file_url(url):
+    """DATABASE_URL must name a SQLite file: the PRAGMAs, BEGIN IMMEDIATE and upserts are SQLite-only,
+    and an in-memory database would be a separate, empty one on every pooled connection."""
+    parsed = make_url(url)
+    database = parsed.database or ''
+    in_memory = (database in ('', ':memory:') or database.startswith('file::memory:')
+                 or parsed.query.get('mode') == 'memory')
+    if parsed.get_backend_name() != 'sqlite' or in_memory:
+        raise ValueError(f"DATABASE_URL must be a SQLite file URL such as sqlite:///portfolio.db, got {url!r}")
+    return url
+
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'nova-terminal-secret-2026'
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///portfolio.db'
+app.config['SQLALCHEMY_DATABASE_URI'] = _sqlite_file_url(os.environ.get('DATABASE_URL', 'sqlite:///portfolio.db'))
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+# Bump the cost here; existing hashes are upgraded on the user's next successful login
+app.config['PASSWORD_HASH_METHOD'] = 'scrypt:32768:8:1'
+# Debugger, reloader and template auto-reload are opt-in (APEX_DEBUG=1). TEMPLATES_AUTO_RELOAD is left
+# unset so it follows app.debug: elsewhere templates are compiled once per worker and never re-stat'ed.
+DEBUG = os.environ.get('APEX_DEBUG') == '1'
+app.jinja_options = {**app.jinja_options, 'cache_size': 400}
+# Keep people signed in for two weeks instead of re-running the scrypt login every browser restart
+app.config['SESSION_COOKIE_SAMESITE'] = 'Lax'
+app.config['PERMANENT_SESSION_LIFETIME'] = datetime.timedelta(days=14)
+# Reuse connections across requests instead of re-opening the db (and its -wal/-shm) each time
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+    "pool_size": 5,
+    "max_overflow": 10,
+    "pool_pre_ping": False,  # A local SQLite file can't drop the connection; skip the SELECT 1 per checkout
+    "pool_recycle": 1800,
+    "connect_args": {"check_same_thread": False, "timeout": 30},
+}
+
+# Behind a reverse proxy, set TRUSTED_PROXY_HOPS to the number of proxies in front of gunicorn so
+# request.remote_addr (the rate limiter's key) is the client from X-Forwarded-For, not the proxy
+_proxy_hops = int(os.environ.get('TRUSTED_PROXY_HOPS', '0'))
+if _proxy_hops:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=_proxy_hops, x_proto=_proxy_hops)
 
 db = SQLAlchemy(app)
+
+
+def _set_sqlite_pragmas(dbapi_connection, _):
+    """WAL lets readers run alongside the writer; NORMAL sync skips the fsync on every commit."""
+    cur = dbapi_connection.cursor()
+    cur.execute("PRAGMA journal_mode=WAL")
+    cur.execute("PRAGMA synchronous=NORMAL")
+    cur.execute("PRAGMA busy_timeout=5000")
+    cur.execute("PRAGMA cache_size=-64000")  # 64 MB page cache per connection
+    cur.execute("PRAGMA temp_store=MEMORY")
+    cur.execute("PRAGMA mmap_size=268435456")  # Reads come straight from a 256 MB mapping
+    cur.close()
+    # Stop pysqlite from issuing its own BEGIN so _begin_transaction controls the lock mode
+    dbapi_connection.isolation_level = None
+
+
+def _begin_transaction(conn):
+    """Writers start IMMEDIATE so they never hit SQLITE_BUSY upgrading a stale read snapshot."""
+    immediate = has_request_context() and g.get('begin_immediate', False)
+    conn.exec_driver_sql("BEGIN IMMEDIATE" if immediate else "BEGIN")
+
+with app.app_context():
+    event.listen(db.engine, "connect", _set_sqlite_pragmas)
+    event.listen(db.engine, "begin", _begin_transaction)
+
+PORTFOLIO_CACHE_SECONDS = 60
+# Every distinct CSV ticker is resolved against Yahoo inside the request, so uploads are capped
+MAX_CSV_TICKERS = 200
+
+# Per-user dashboard totals, dropped by every route that changes that user's holdings
+_dashboard_cache = TTLCache(maxsize=1024, ttl=30)
+_dashboard_lock = threading.Lock()
+
+# Rendered stock chart PNGs per (ticker, day) as {kind: (png, etag)}; they only change when a new daily bar lands
+_chart_cache = TTLCache(maxsize=512, ttl=3600)
+_chart_lock = threading.Lock()
+# Striped render locks, so the page's parallel image requests for one ticker share one render. A
+# fixed pool keeps memory flat however many (possibly bogus) tickers get requested.
+_chart_render_locks = tuple(threading.Lock() for _ in range(64))
+
+# Benchmark PNGs per (portfolio, holdings version), rendered off the request path by _render_pool.
+# Renders that produced no chart (often a transient Yahoo failure) go in _benchmark_misses as b''
+# for only a minute, so a later poll or view retries them. Guarded by _chart_lock, like _benchmark_jobs.
+_benchmark_cache = TTLCache(maxsize=256, ttl=3600)
+_benchmark_misses = TTLCache(maxsize=256, ttl=60)
+_benchmark_jobs = {}
+_render_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix='chart-render')
+
 login_manager = LoginManager(app)
 login_manager.login_view = "login"
 
 # --- Models ---
 class User(db.Model, UserMixin):
     id = db.Column(db.Integer, primary_key=True)
-    email = db.Column(db.String(150), unique=True, nullable=False)
+    # NOCASE makes the unique index itself serve case-insensitive login/signup lookups
+    email = db.Column(db.String(150, collation='NOCASE'), unique=True, nullable=False)
     password = db.Column(db.String(300), nullable=False)
-    portfolios = db.relationship("Portfolio", backref="owner", lazy=True, cascade="all, delete-orphan")
+    portfolios = db.relationship("Portfolio", backref="owner", lazy="selectin", cascade="all, delete-orphan")
 
 class Portfolio(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    holdings = db.relationship("Holding", backref="parent_portfolio", lazy=True, cascade="all, delete-orphan")
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
+    # Valuation snapshot for view_portfolio; cleared whenever holdings change
+    cached_total = db.Column(db.Float)
+    cached_day_change = db.Column(db.Float)
+    cached_sector_json = db.Column(db.Text)
+    cached_at = db.Column(db.DateTime)
+    holdings = db.relationship("Holding", backref="parent_portfolio", lazy="selectin", cascade="all, delete-orphan")
 
 class Holding(db.Model):
+    # The unique constraint's implicit btree also serves the (portfolio_id, ticker) lookups
+    __table_args__ = (db.UniqueConstraint('portfolio_id', 'ticker', name='uq_holding_portfolio_ticker'),)
+
     id = db.Column(db.Integer, primary_key=True)
     ticker = db.Column(db.String(10), nullable=False)
     quantity = db.Column(db.Float, nullable=False)
     portfolio_id = db.Column(db.Integer, db.ForeignKey('portfolio.id'), nullable=False)
 
+
+def init_db():
+    """create_all for a fresh database, then bring a portfolio.db made by an older release up to date.
+
+    create_all never touches tables that already exist, so the snapshot columns and indexes added
+    since are applied here; every step is a no-op once it has run.
+    """
+    db.create_all()
+    with db.engine.begin() as conn:
+        inspector = inspect(conn)
+        have = {c['name'] for c in inspector.get_columns('portfolio')}
+        for column in ('cached_total', 'cached_day_change', 'cached_sector_json', 'cached_at'):
+            if column not in have:
+                col_type = Portfolio.__table__.c[column].type.compile(dialect=conn.dialect)
+                conn.exec_driver_sql(f"ALTER TABLE portfolio ADD COLUMN {column} {col_type}")
+        conn.exec_driver_sql("CREATE INDEX IF NOT EXISTS ix_portfolio_user_id ON portfolio (user_id)")
+        unique_keys = [u['column_names'] for u in inspector.get_unique_constraints('holding')]
+        unique_keys += [i['column_names'] for i in inspector.get_indexes('holding') if i['unique']]
+        if ['portfolio_id', 'ticker'] not in unique_keys:
+            # Older code could insert the same ticker twice; fold duplicates into the oldest row first
+            conn.exec_driver_sql(
+                "UPDATE holding SET quantity = (SELECT SUM(h.quantity) FROM holding h"
+                " WHERE h.portfolio_id = holding.portfolio_id AND h.ticker = holding.ticker)"
+                " WHERE id IN (SELECT MIN(id) FROM holding GROUP BY portfolio_id, ticker HAVING COUNT(*) > 1)")
+            conn.exec_driver_sql(
+                "DELETE FROM holding WHERE id NOT IN (SELECT MIN(id) FROM holding GROUP BY portfolio_id, ticker)")
+            conn.exec_driver_sql("CREATE UNIQUE INDEX uq_holding_portfolio_ticker ON holding (portfolio_id, ticker)")
+
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    # Flask-Login keeps the result on g._login_user, so this runs at most once per request
+    # The user and their portfolios come in one joined SELECT and all holdings in one more. Any other
+    # relationship reached through them (owner, parent_portfolio) raises rather than lazy-loading,
+    # unless the object is already in the session's identity map.
+    return db.session.get(User, int(user_id), options=[
+        joinedload(User.portfolios).options(
+            selectinload(Portfolio.holdings).raiseload("*", sql_only=True),
+            raiseload("*", sql_only=True))])
 
 # --- Helpers ---
+def rate_limited(max_posts, template, window=60, failures_only=False):
+    """Caps POSTs per client IP per fixed window, so bot storms can't pin the CPU on password hashing.
+    With failures_only, POSTs the view flags with mark_attempt_succeeded() are refunded afterwards."""
+    # ip -> [count]; the list is bumped in place, so the entry's TTL runs from the window's first
+    # counted attempt and retrying while locked out doesn't extend it
+    attempts = TTLCache(maxsize=10000, ttl=window)
+    lock = threading.Lock()
+
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            if request.method != 'POST':
+                return view(*args, **kwargs)
+            ip = request.remote_addr
+            # Check and count in one step, before the view hashes anything, so a parallel burst
+            # can't all slip past the cap
+            with lock:
+                entry = attempts.get(ip)
+                if entry is None:
+                    entry = attempts[ip] = [0]
+                limited = entry[0] >= max_posts
+                if not limited:
+                    entry[0] += 1
+            if limited:
+                flash("Too many attempts. Please wait a minute and try again.")
+                return render_template(template), 429
+            response = view(*args, **kwargs)
+            if failures_only and g.get('attempt_succeeded'):
+                with lock:
+                    entry[0] -= 1
+            return response
+        return wrapper
+    return decorator
+
+def mark_attempt_succeeded():
+    """Refunds this POST's slot in a failures_only rate limit."""
+    g.attempt_succeeded = True
+
+@contextlib.contextmanager
+def write_transaction():
+    """Runs the block in its own BEGIN IMMEDIATE transaction, committed on exit (rolled back on error).
+    Enter it after any slow validation (e.g. yfinance lookups) so the write lock is held briefly;
+    statements after the block go back to ordinary deferred transactions."""
+    db.session.commit()  # End the request's read transaction so the next BEGIN is IMMEDIATE
+    g.begin_immediate = True
+    try:
+        yield
+        db.session.commit()
+    except BaseException:
+        db.session.rollback()
+        raise
+    finally:
+        g.begin_immediate = False
+
+def read_csv_holdings(csv_file, chunksize=50_000):
+    """Merged (ticker, quantity) frame from an uploaded CSV, read chunksize rows at a time, plus the
+    spreadsheet row numbers (header = row 1) of rows skipped for a blank ticker or a quantity that
+    isn't a finite number above zero."""
+    reader = pd.read_csv(csv_file, usecols=lambda c: c.strip().lower() in ('ticker', 'quantity'),
+                         chunksize=chunksize)
+    # Each chunk is folded into a per-ticker running total, so memory is bounded by the chunk plus
+    # the distinct tickers, not the file
+    totals = pd.Series(dtype=np.float64)
+    skipped = []
+    for chunk in reader:
+        chunk.columns = chunk.columns.str.strip().str.lower()
+        tickers = chunk['ticker'].astype('string').str.strip().str.upper()
+        qty = pd.to_numeric(chunk['quantity'], errors='coerce').to_numpy(dtype=np.float64)
+        valid = (tickers.fillna('') != '').to_numpy(dtype=bool) & np.isfinite(qty) & (qty > 0)
+        skipped.extend((chunk.index[~valid] + 2).tolist())
+        sums = pd.Series(qty[valid], index=tickers[valid].astype(object)).groupby(level=0).sum()
+        totals = totals.add(sums, fill_value=0)
+    holdings = pd.DataFrame({'ticker': totals.index.astype(object), 'quantity': totals.to_numpy()})
+    return holdings, skipped
+
+def validate_tickers(tickers):
+    """The subset of tickers yfinance can resolve, looked up concurrently (and cached for later pages)."""
+    tickers = sorted(tickers)
+    if not tickers:
+        return set()
+    with ThreadPoolExecutor(max_workers=min(16, len(tickers))) as ex:
+        return {t for t, stock in zip(tickers, ex.map(_warm_stock, tickers)) if stock is not None}
+
+def snapshot_is_fresh(p_db, now):
+    return p_db.cached_at is not None and (now - p_db.cached_at).total_seconds() < PORTFOLIO_CACHE_SECONDS
+
+def invalidate_dashboard_cache():
+    with _dashboard_lock:
+        _dashboard_cache.pop(current_user.id, None)
+
+def invalidate_portfolio_cache(p_id):
+    Portfolio.query.filter_by(id=p_id).update({'cached_at': None})
+    invalidate_dashboard_cache()
+
+def hash_password(password):
+    return generate_password_hash(password, method=app.config['PASSWORD_HASH_METHOD'])
+
+def password_needs_rehash(pw_hash):
+    # Werkzeug hashes are "<method>$<salt>$<digest>", so the prefix records the parameters used
+    return not pw_hash.startswith(app.config['PASSWORD_HASH_METHOD'] + '$')
+
+# Verified against when the email is unknown, so both login branches pay the same KDF cost
+_DUMMY_HASH = hash_password("x" * 16)
+
+def get_stock(ticker, quantity=0, history_df=None):
+    """Request-scoped Stock lookup: a ticker resolves once per request even if the shared TTL cache
+    expires partway through, so every portfolio on the page values it from the same quote."""
+    ticker = ticker.upper()
+    stocks = g.setdefault('_stocks', {})
+    if ticker not in stocks:
+        stocks[ticker] = get_cached_stock(ticker, history_df=history_df)
+    return stocks[ticker].with_quantity(quantity)
+
+def _warm_stock(ticker, history_df=None):
+    try:
+        return get_cached_stock(ticker, history_df=history_df)
+    except Exception:
+        return None  # Invalid tickers are skipped again by the serial add below
+
 def build_portfolio_logic(portfolio_db_obj):
+    # Memoized per request, so repeated builds of the same portfolio share one object
+    cache = g.setdefault('_portfolio_logic', {})
+    if portfolio_db_obj.id in cache:
+        return cache[portfolio_db_obj.id]
+
+    # Tickers with a fresh shared Stock are used as-is. For the rest, one batched history download
+    # seeds every new Stock's risk metrics and day change, and the per-ticker quote lookups run
+    # concurrently. Worker threads have no app context, so their results are put into the
+    # request's Stock memo here.
+    memo = g.setdefault('_stocks', {})
+    for ticker in {h.ticker.upper() for h in portfolio_db_obj.holdings} - memo.keys():
+        stock = peek_cached_stock(ticker)
+        if stock is not None:
+            memo[ticker] = stock
+    tickers = sorted({h.ticker.upper() for h in portfolio_db_obj.holdings} - memo.keys())
+    if tickers:
+        frames = get_price_frames(tickers)
+        with ThreadPoolExecutor(max_workers=min(16, len(tickers))) as ex:
+            for ticker, stock in zip(tickers, ex.map(lambda t: _warm_stock(t, frames.get(t)), tickers)):
+                if stock is not None:
+                    memo[ticker] = stock
+
     p_logic = StockPortfolio(name=portfolio_db_obj.name)
     for h in portfolio_db_obj.holdings:
         try:
-            p_logic.add_stock(h.ticker, h.quantity)
-        except: continue
+            # Holdings are unique per (portfolio, ticker), so no quantities need merging
+            p_logic.stocks[h.ticker.upper()] = get_stock(h.ticker, h.quantity)
+        except (ConnectionError, ValueError) as e:
+            app.logger.warning("Skipping %s in portfolio %s: %s", h.ticker, portfolio_db_obj.id, e)
+    cache[portfolio_db_obj.id] = p_logic
     return p_logic
 
-def get_plot_url():
-    img = io.BytesIO()
-    plt.savefig(img, format='png', bbox_inches='tight', facecolor='#1e293b')
+def get_price_frames(tickers, period="1y"):
+    """One batched yfinance download per request and period; frames are kept on flask.g for reuse."""
+    frames = g.setdefault('_price_frames', {}).setdefault(period, {})
+    missing = set(tickers) - frames.keys()
+    if missing:
+        frames.update(download_batch(missing, period=period))
+    return frames
+
+def _quote_frame(ticker):
+    """One-row price frame from the live quote, or None if the lookup fails."""
+    try:
+        return pd.DataFrame({'Close': [cached_price(ticker)]},
+                            index=pd.DatetimeIndex([pd.Timestamp.now()], name='Date'))
+    except Exception:
+        return None
+
+def build_portfolios_bulk(portfolios):
+    """Builds logic objects for several portfolios for their totals: fresh shared Stocks are reused,
+    the rest are priced from a single short download."""
+    tickers = {h.ticker.upper() for p in portfolios for h in p.holdings}
+    cached = {}
+    for ticker in tickers:
+        stock = peek_cached_stock(ticker)
+        if stock is not None:
+            cached[ticker] = stock
+    # Totals only need the latest close, so five days is plenty
+    frames = dict(get_price_frames(tickers - cached.keys(), period="5d"))
+
+    # Symbols the batch endpoint dropped are quoted individually, overlapped on a thread pool
+    missing = sorted(tickers - frames.keys() - cached.keys())
+    if missing:
+        with ThreadPoolExecutor(max_workers=8) as ex:
+            for ticker, frame in zip(missing, ex.map(_quote_frame, missing)):
+                if frame is not None:
+                    frames[ticker] = frame
+
+    logic = {}
+    for p in portfolios:
+        p_logic = StockPortfolio(name=p.name)
+        for h in p.holdings:
+            ticker = h.ticker.upper()
+            if ticker in cached:
+                p_logic.stocks[ticker] = cached[ticker].with_quantity(h.quantity)
+                continue
+            if ticker not in frames:
+                continue
+            try:
+                p_logic.add_stock_from_frame(ticker, h.quantity, frames[ticker])
+            except ValueError as e:
+                app.logger.warning("Skipping %s in portfolio %s: %s", ticker, p.id, e)
+        logic[p.id] = p_logic
+    return logic
+
+class DeferredTotals:
+    """Values the portfolios on first lookup so a streamed template can flush its header first."""
+    def __init__(self, user_id, portfolios):
+        self._user_id = user_id
+        self._portfolios = portfolios
+        self._totals = None
+
+    def __getitem__(self, p_id):
+        if self._totals is None:
+            with _dashboard_lock:
+                cached = _dashboard_cache.get(self._user_id)
+            if cached is not None and all(p.id in cached for p in self._portfolios):
+                self._totals = cached
+            else:
+                # Fresh row snapshots (written by view_portfolio) are used as-is; only stale ones are valued
+                now = datetime.datetime.now()
+                self._totals = {p.id: p.cached_total for p in self._portfolios if snapshot_is_fresh(p, now)}
+                stale = [p for p in self._portfolios if p.id not in self._totals]
+                if stale:
+                    self._totals.update({p_id: p_logic.get_portfolio_value()
+                                         for p_id, p_logic in build_portfolios_bulk(stale).items()})
+                with _dashboard_lock:
+                    _dashboard_cache[self._user_id] = self._totals
+        return self._totals[p_id]
+
+def load_visuals():
+    """Imports matplotlib/mplfinance (Agg backend) on the first chart render instead of at worker start-up."""
+    import visuals
+    return visuals
+
+# One PNG buffer per thread, rewound for each render instead of re-grown from empty
+_plot_buffers = threading.local()
+
+def get_plot_bytes(fig):
+    """PNG bytes of one Figure (None passes through). No pyplot state, so safe across threads."""
+    if fig is None:
+        return None
+    img = getattr(_plot_buffers, 'buf', None)
+    if img is None:
+        img = _plot_buffers.buf = io.BytesIO()
     img.seek(0)
-    url = base64.b64encode(img.getvalue()).decode('utf-8')
-    plt.close('all')
-    return url
+    img.truncate()
+    # Layout is fixed when the chart is built, so no bbox_inches='tight' measuring draw here
+    fig.savefig(img, format='png', facecolor='#1e293b')
+    fig.clf()
+    return img.getvalue()  # Copied out: the bytes outlive the buffer in the chart caches
+
+def benchmark_version(p_db):
+    """Changes when the holdings or the trading day do, which is when the benchmark chart can."""
+    holdings = tuple(sorted((h.ticker, h.quantity) for h in p_db.holdings))
+    # crc32 rather than hash(): str hashes are salted per process, and every worker must agree
+    return f"{datetime.date.today():%Y%m%d}-{zlib.crc32(repr(holdings).encode()):x}"
+
+def _render_benchmark(key, p_logic):
+    try:
+        hist = p_logic.get_portfolio_history()
+        png = None if hist.empty else get_plot_bytes(load_visuals().PortfolioVisuals(hist).create_benchmark_comparison())
+    except Exception:
+        png = None
+    with _chart_lock:
+        if png:
+            _benchmark_cache[key] = png
+        else:
+            _benchmark_misses[key] = b''
+        _benchmark_jobs.pop(key, None)
+
+def cached_benchmark(key):
+    """The rendered PNG, b'' for a recent render with no chart, or None if it needs (re)rendering.
+    Caller holds _chart_lock."""
+    png = _benchmark_cache.get(key)
+    return png if png is not None else _benchmark_misses.get(key)
+
+def schedule_benchmark(p_db, version):
+    """Queues the benchmark render for this holdings version unless it is cached or in flight."""
+    key = (p_db.id, version)
+    with _chart_lock:
+        if cached_benchmark(key) is not None or key in _benchmark_jobs:
+            return
+        _benchmark_jobs[key] = None  # Claimed; the future is filled in below
+    try:
+        p_logic = build_portfolio_logic(p_db)
+        future = _render_pool.submit(_render_benchmark, key, p_logic)
+    except Exception:
+        with _chart_lock:
+            _benchmark_jobs.pop(key, None)
+        raise
+    with _chart_lock:
+        if key in _benchmark_jobs:  # The render may already have finished and cleared it
+            _benchmark_jobs[key] = future
+
+# /chart/<ticker>/<kind>.png -> StockVisuals method
+CHART_KINDS = {'bollinger': 'create_volatility_chart', 'volume': 'create_price_volume_line_chart'}
+
+def stock_chart_png(ticker, kind):
+    """(png, etag) for one stock chart; png is b'' when there was nothing to plot. Every kind is
+    rendered from a single history download, at most once per ticker per day per worker."""
+    key = (ticker, datetime.date.today())
+    with _chart_lock:
+        charts = _chart_cache.get(key)
+    if charts is None:
+        with _chart_render_locks[hash(ticker) % len(_chart_render_locks)]:
+            with _chart_lock:
+                charts = _chart_cache.get(key)
+            if charts is None:
+                visualizer = load_visuals().StockVisuals(get_stock(ticker).history.yearly())
+                charts = {}
+                for name, method in CHART_KINDS.items():
+                    png = get_plot_bytes(getattr(visualizer, method)(ticker=ticker)) or b''
+                    charts[name] = (png, f"{zlib.crc32(png):x}-{len(png)}")
+                with _chart_lock:
+                    _chart_cache[key] = charts
+    return charts[kind]
 
 # ------------------ ROUTES ------------------
 @app.route('/')
@@ -74,29 +513,41 @@ def home():
 
 
 @app.route('/signup', methods=['GET', 'POST'])
+@rate_limited(5, 'signup.html')
 def signup():
     if request.method == 'POST':
         email = request.form.get('email').lower()
         password = request.form.get('password')
-        if User.query.filter_by(email=email).first():
-            flash("An Account already exists for this email.")
-            return redirect(url_for('signup'))
-        user = User(email=email, password=generate_password_hash(password))
-        db.session.add(user)
-        db.session.commit()
+        pw_hash = hash_password(password)  # Hash before taking the write lock
+        with write_transaction():
+            if User.query.filter_by(email=email).first():
+                flash("An Account already exists for this email.")
+                return redirect(url_for('signup'))
+            db.session.execute(insert(User).values(email=email, password=pw_hash))
         flash("Secure access established. Please log in.")
         return redirect(url_for('login'))
     return render_template('signup.html')
 
 
 @app.route('/login', methods=['GET', 'POST'])
+@rate_limited(5, 'login.html', failures_only=True)
 def login():
     if request.method == 'POST':
         email = request.form.get('email').lower()
         password = request.form.get('password')
         user = User.query.filter_by(email=email).first()
-        if user and check_password_hash(user.password, password):
+        if not user:
+            check_password_hash(_DUMMY_HASH, password)
+            flash("Invalid credentials.")
+            return render_template('login.html')
+        if check_password_hash(user.password, password):
+            if password_needs_rehash(user.password):
+                new_hash = hash_password(password)  # Hash before taking the write lock
+                with write_transaction():
+                    user.password = new_hash
+            session.permanent = True
             login_user(user)
+            mark_attempt_succeeded()
             return redirect(url_for('dashboard'))
         flash("Invalid credentials.")
     return render_template('login.html')
@@ -107,9 +558,14 @@ def login():
 def dashboard():
     """Main hub showing all portfolios (portfolio_view.html)"""
     user_portfolios = current_user.portfolios
-    # We name this portfolio_totals so the HTML template can find it
-    portfolio_totals = {p.id: build_portfolio_logic(p).get_portfolio_value() for p in user_portfolios}
-    return render_template('portfolio_view.html', portfolios=user_portfolios, portfolio_totals=portfolio_totals)
+    # We name this portfolio_totals so the HTML template can find it. It is filled lazily and the
+    # page is streamed, so the shell reaches the browser while the Yahoo download is in flight.
+    portfolio_totals = DeferredTotals(current_user.id, user_portfolios)
+    # Streaming sends the session cookie before the body renders, so flashes are popped here, while
+    # the removal can still reach the cookie, rather than by base.html mid-stream
+    messages = get_flashed_messages()
+    return stream_template('portfolio_view.html', portfolios=user_portfolios, portfolio_totals=portfolio_totals,
+                           flashed_messages=messages)
 
 
 
@@ -117,33 +573,73 @@ def dashboard():
 @login_required
 def view_portfolio(p_id):
     """Detailed management page for one portfolio (dashboard.html)"""
-    p_db = Portfolio.query.get_or_404(p_id)
+    p_db = Portfolio.query.options(selectinload(Portfolio.holdings)).get_or_404(p_id)
     if p_db.user_id != current_user.id: return "Unauthorized", 403
 
-    p_logic = build_portfolio_logic(p_db)
-    total_val = p_logic.get_portfolio_value()
-
-    # Calculate Day Change
-    total_diff = 0
-    for s in p_logic.stocks.values():
-        diff, _ = s.get_change(period="daily")
-        total_diff += (diff * s.get_quantity_held())
-    prev_val = total_val - total_diff
-    pct_change = round((total_diff / prev_val * 100), 2) if prev_val != 0 else 0
+    now = datetime.datetime.now()
+    cache_fresh = snapshot_is_fresh(p_db, now)
+    # The sidebar lists the user's portfolios, so creating or deleting one must change the ETag too
+    sidebar = zlib.crc32(repr([(p.id, p.name) for p in current_user.portfolios]).encode())
+    if cache_fresh:
+        etag = f"{p_id}-{int(p_db.cached_at.timestamp())}-{sidebar:x}"
+        # Re-visit within the cache window: bodyless 304, no yfinance calls or template render.
+        # Not while flashes are pending (e.g. a failed add_stock), or they'd only surface on a later page.
+        if not session.get('_flashes') and request.if_none_match.contains_weak(etag):
+            response = make_response('', 304)
+            response.set_etag(etag, weak=True)
+            response.cache_control.private = True
+            return response
 
-    benchmark_url = None
-    try:
-        hist = p_logic.get_portfolio_history()
-        if not hist.empty:
-            vis = PortfolioVisuals(hist)
-            vis.create_benchmark_comparison()
-            benchmark_url = get_plot_url()
-    except:
-        pass
+    p_logic = build_portfolio_logic(p_db)
 
-    return render_template('dashboard.html', portfolio=p_logic, active_portfolio_db=p_db, total_value=total_val,
-                           day_change_pct=pct_change, sector_data=p_logic.holding_by_sector(),
-                           benchmark_chart=benchmark_url)
+    if cache_fresh:
+        total_val = p_db.cached_total
+        pct_change = p_db.cached_day_change
+        sector_data = json.loads(p_db.cached_sector_json)
+    else:
+        total_val = p_logic.get_portfolio_value()
+
+        # Calculate Day Change as quantities . (last close - previous close), taken in one pass over
+        # whatever batch download build_portfolio_logic made (nothing more is fetched here)
+        tickers = list(p_logic.stocks)
+        frames = g.get('_price_frames', {}).get("1y", {})
+        closes = pd.DataFrame({t: frames[t]['Close'] for t in tickers if t in frames}, columns=tickers)
+        last_two = closes.ffill().to_numpy(dtype=np.float64)[-2:]
+        day_diff = last_two[1] - last_two[0] if len(last_two) == 2 else np.full(len(tickers), np.nan)
+        # Tickers served from the shared Stock cache (or dropped by the batch) use the 60s fast_info quote;
+        # one without a previous close adds no day change rather than a move spanning several sessions
+        for i in np.flatnonzero(np.isnan(day_diff)):
+            try:
+                quote = cached_quote(tickers[i])
+            except Exception:
+                quote = {}
+            prev_close = quote.get('previousClose')
+            day_diff[i] = quote['currentPrice'] - prev_close if prev_close else 0.0
+        qty = np.fromiter((p_logic.stocks[t].get_quantity_held() for t in tickers), dtype=np.float64,
+                          count=len(tickers))
+        total_diff = float(np.dot(qty, day_diff))
+        prev_val = total_val - total_diff
+        pct_change = round((total_diff / prev_val * 100), 2) if prev_val != 0 else 0
+        sector_data = p_logic.holding_by_sector()
+
+        with write_transaction():
+            p_db.cached_total = total_val
+            p_db.cached_day_change = pct_change
+            p_db.cached_sector_json = json.dumps(sector_data)
+            p_db.cached_at = now
+        etag = f"{p_id}-{int(now.timestamp())}-{sidebar:x}"
+
+    # History download + rendering happen on the render pool; the page polls the PNG route for it
+    version = benchmark_version(p_db)
+    schedule_benchmark(p_db, version)
+    benchmark_url = url_for('benchmark_chart', p_id=p_id, v=version)
+
+    response = make_response(render_template('dashboard.html', portfolio=p_logic, active_portfolio_db=p_db,
+                                             total_value=total_val, day_change_pct=pct_change,
+                                             sector_data=sector_data, benchmark_chart_url=benchmark_url))
+    response.set_etag(etag, weak=True)
+    response.cache_control.private = True  # Per-user page; keep it out of shared caches
+    return response
 
 
 # --- ADDED MISSING ROUTE ---
@@ -152,19 +648,57 @@ def view_portfolio(p_id):
 def initialize_portfolio():
     """Creates a new portfolio and redirects back to the hub"""
     name = request.form.get('name')
-    ticker = request.form.get('ticker').upper().strip()
-
-    new_p = Portfolio(name=name, user_id=current_user.id)
-    db.session.add(new_p)
-    db.session.flush()
+    ticker = (request.form.get('ticker') or '').upper().strip()
+    qty_str = (request.form.get('quantity') or '').strip()
+    csv_file = request.files.get('csv_file')
+    notes = []
 
     try:
-        qty = float(request.form.get('quantity'))
-        # Use Stock class to validate ticker exists
-        Stock(ticker, quantity=0)
-        db.session.add(Holding(ticker=ticker, quantity=qty, portfolio_id=new_p.id))
-        db.session.commit()
-        flash(f"Portfolio {name} created successfully.")
+        if csv_file and csv_file.filename:
+            holdings, skipped_rows = read_csv_holdings(csv_file)
+            if len(holdings) > MAX_CSV_TICKERS:
+                flash(f"Initialization error: the CSV lists {len(holdings)} different tickers;"
+                      f" at most {MAX_CSV_TICKERS} can be imported at once.")
+                return redirect(url_for('dashboard'))
+            # Resolve tickers before write_transaction, so the Yahoo lookups don't hold the write lock
+            known = validate_tickers(holdings['ticker'].tolist())
+            unknown = sorted(set(holdings['ticker']) - known)
+            holdings = holdings[holdings['ticker'].isin(known)]
+            if skipped_rows:
+                rows = ", ".join(map(str, skipped_rows[:10])) + (", ..." if len(skipped_rows) > 10 else "")
+                notes.append(f"Skipped {len(skipped_rows)} CSV row(s) without a ticker and positive quantity"
+                             f" (rows {rows}).")
+            if unknown:
+                notes.append(f"Skipped unknown ticker(s): {', '.join(unknown[:10])}"
+                             f"{', ...' if len(unknown) > 10 else ''}.")
+            if holdings.empty:
+                flash(" ".join(["Initialization error: the CSV has no valid holdings."] + notes))
+                return redirect(url_for('dashboard'))
+        else:
+            if not ticker or not qty_str:
+                flash("Initialization error: enter a ticker and quantity, or choose a CSV file.")
+                return redirect(url_for('dashboard'))
+            try:
+                qty = float(qty_str)
+            except ValueError:
+                qty = float('nan')
+            if not (np.isfinite(qty) and qty > 0):
+                flash("Initialization error: quantity must be a number greater than zero.")
+                return redirect(url_for('dashboard'))
+            # Building the (cached) Stock validates that the ticker exists
+            get_stock(ticker)
+            holdings = pd.DataFrame({'ticker': [ticker], 'quantity': [qty]})
+
+        with write_transaction():
+            # Plain Core INSERTs: no unit-of-work flush or identity-map bookkeeping for new rows
+            new_p_id = db.session.execute(
+                insert(Portfolio).values(name=name, user_id=current_user.id).returning(Portfolio.id)).scalar_one()
+            # Tickers are already merged, so one executemany covers the whole import
+            db.session.execute(insert(Holding), [
+                {'ticker': t, 'quantity': q, 'portfolio_id': new_p_id}
+                for t, q in zip(holdings['ticker'].tolist(), holdings['quantity'].tolist())])
+        invalidate_dashboard_cache()
+        flash(" ".join([f"Portfolio {name} created successfully."] + notes))
     except Exception as e:
         db.session.rollback()
         flash(f"Initialization error: {str(e)}")
@@ -180,17 +714,18 @@ def add_stock():
     ticker_symbol = request.form.get('ticker').upper().strip()
     qty_str = request.form.get('quantity')
     try:
-        temp_stock = Stock(ticker_symbol, quantity=0)
+        get_stock(ticker_symbol)
         quantity = float(qty_str)
-        existing = Holding.query.filter_by(portfolio_id=p_id, ticker=ticker_symbol).first()
-        if existing:
-            existing.quantity += quantity
-        else:
-            new_h = Holding(ticker=ticker_symbol, quantity=quantity, portfolio_id=p_id)
-            db.session.add(new_h)
-        db.session.commit()
+        with write_transaction():
+            # Single atomic statement: insert the position or top up the existing one
+            stmt = sqlite_insert(Holding).values(portfolio_id=int(p_id), ticker=ticker_symbol, quantity=quantity)
+            stmt = stmt.on_conflict_do_update(index_elements=['portfolio_id', 'ticker'],
+                                              set_={'quantity': Holding.quantity + stmt.excluded.quantity})
+            db.session.execute(stmt)
+            invalidate_portfolio_cache(p_id)
         flash(f"Verified and added {ticker_symbol}.")
     except Exception as e:
+        db.session.rollback()
         flash(f"Error: {str(e)}")
     return redirect(url_for('view_portfolio', p_id=p_id))
 
@@ -201,35 +736,37 @@ def sell_stock():
     holding_id = request.form.get('holding_id')
     sell_all = request.form.get('sell_all') == 'true'
     qty_input = request.form.get('quantity')
-    holding = Holding.query.get_or_404(holding_id)
-    p_id = holding.portfolio_id
-    if sell_all:
-        db.session.delete(holding)
-    else:
-        try:
-            sell_qty = float(qty_input) if qty_input else 0
-            if sell_qty >= holding.quantity:
-                db.session.delete(holding)
-            else:
-                holding.quantity -= sell_qty
-        except ValueError:
-            flash("Invalid quantity.")
-    db.session.commit()
+    with write_transaction():
+        holding = Holding.query.get_or_404(holding_id)
+        p_id = holding.portfolio_id
+        if sell_all:
+            db.session.delete(holding)
+        else:
+            try:
+                sell_qty = float(qty_input) if qty_input else 0
+                if sell_qty >= holding.quantity:
+                    db.session.delete(holding)
+                else:
+                    holding.quantity -= sell_qty
+            except ValueError:
+                flash("Invalid quantity.")
+        invalidate_portfolio_cache(p_id)
     return redirect(url_for('view_portfolio', p_id=p_id))
 
 
 @app.route('/delete_portfolio/<int:p_id>', methods=['POST'])
 @login_required
 def delete_portfolio(p_id):
-    p = Portfolio.query.get_or_404(p_id)
-    # Security: Ensure only the owner can delete
-    if p.user_id != current_user.id:
-        flash("Unauthorized deletion attempt.")
-        return redirect(url_for('dashboard'))
-
-    db.session.delete(p)
-    db.session.commit()
-    flash(f"Portfolio '{p.name}' and all its assets have been liquidated.")
+    with write_transaction():
+        p = Portfolio.query.get_or_404(p_id)
+        # Security: Ensure only the owner can delete
+        if p.user_id != current_user.id:
+            flash("Unauthorized deletion attempt.")
+            return redirect(url_for('dashboard'))
+        name = p.name
+        db.session.delete(p)
+    invalidate_dashboard_cache()
+    flash(f"Portfolio '{name}' and all its assets have been liquidated.")
     return redirect(url_for('dashboard'))
 
 
@@ -237,22 +774,54 @@ def delete_portfolio(p_id):
 @login_required
 def stock_detail(ticker):
     try:
-        stock_obj = Stock(ticker)
+        stock_obj = get_stock(ticker, quantity=1)
         dollar_change, pct_change = stock_obj.get_change(period="daily")
-        hist_df = stock_obj.history.yearly()
-        visualizer = StockVisuals(hist_df)
-        plt.style.use('dark_background')
-        visualizer.create_volatility_chart(ticker=ticker)
-        bollinger_url = get_plot_url()
-        visualizer.create_price_volume_line_chart(ticker=ticker)
-        volume_url = get_plot_url()
+        # The charts are separate, browser-cacheable requests to the chart route below
         return render_template('stock_detail.html', stock=stock_obj, dollar_change=dollar_change,
-                               pct_change=pct_change, bollinger_chart=bollinger_url, volume_chart=volume_url)
+                               pct_change=pct_change, chart_day=datetime.date.today().isoformat())
     except Exception as e:
         flash(f"Error loading visuals: {e}")
         return redirect(url_for('dashboard'))
 
 
+@app.route('/chart/<ticker>/<kind>.png')
+@login_required
+def chart(ticker, kind):
+    if kind not in CHART_KINDS:
+        abort(404)
+    try:
+        png, etag = stock_chart_png(ticker.upper(), kind)
+    except Exception:
+        abort(404)
+    if not png:
+        abort(404)
+    # conditional send_file answers a matching If-None-Match with a bodyless 304
+    return send_file(io.BytesIO(png), mimetype='image/png', max_age=3600, etag=etag)
+
+
+@app.route('/portfolio/<int:p_id>/benchmark.png')
+@login_required
+def benchmark_chart(p_id):
+    """Serves the background-rendered benchmark chart: 202 while pending, 404 if there is no chart."""
+    p_db = Portfolio.query.get_or_404(p_id)
+    if p_db.user_id != current_user.id: return "Unauthorized", 403
+
+    version = benchmark_version(p_db)
+    with _chart_lock:
+        png = cached_benchmark((p_id, version))
+    if png is None:
+        # Also covers a render queued by another worker process
+        schedule_benchmark(p_db, version)
+        return '', 202
+    if not png:
+        return '', 404
+    response = make_response(png)
+    response.mimetype = 'image/png'
+    # The URL carries the version, so the browser can keep the image until the holdings change
+    response.headers['Cache-Control'] = 'private, max-age=3600'
+    return response
+
+
 @app.route('/logout')
 @login_required
 def logout():
@@ -260,7 +829,13 @@ def logout():
     return redirect(url_for('login'))
 
 
+# Parse every template up front so the first request on a fresh worker doesn't pay for it
+for _template in app.jinja_env.list_templates():
+    app.jinja_env.get_template(_template)
+
+
 if __name__ == '__main__':
     with app.app_context():
-        db.create_all()
-    app.run(debug=True, host='0.0.0.0', port=5001)
\ No newline at end of file
+        init_db()
+    # Development server only; production runs under gunicorn (see README)
+    app.run(debug=DEBUG, threaded=True, host='0.0.0.0', port=5001)
\ No newline at end of file
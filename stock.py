@@ -1,23 +1,389 @@
 import yfinance as yf
+import copy
 import datetime
+import io
+import json
+import os
+import sqlite3
+import time
+from contextlib import closing
+from functools import cached_property
+import threading
+import warnings
+from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import pandas as pd
 import numpy as np
+from cachetools import TTLCache, LRUCache
+
+try:
+    import bottleneck as bn
+except ImportError:  # Optional; rolling_mean_std falls back to numpy's sliding windows
+    bn = None
+
+# Process-wide Yahoo caches: quotes go stale within a minute, company metadata barely changes.
+_price_cache = TTLCache(maxsize=4096, ttl=60)
+_quote_cache = TTLCache(maxsize=4096, ttl=60)
+_info_cache = TTLCache(maxsize=4096, ttl=60 * 60 * 24)
+_stock_cache = TTLCache(maxsize=2048, ttl=60)
+_change_cache = TTLCache(maxsize=8192, ttl=60)  # keyed "{ticker}:{period}"
+# Last good `.info` per ticker, served while an expired entry is re-fetched in the background
+_info_last = LRUCache(maxsize=4096)
+# Last good quote per ticker, used if a fast_info lookup fails
+_quote_last = LRUCache(maxsize=4096)
+_info_refreshing = set()
+_refresh_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix='info-refresh')
+_cache_lock = threading.Lock()
+
+# Optional on-disk copy of `.info` payloads (APEX_YF_CACHE=<sqlite file>), so CLI runs, tests and
+# restarted workers skip the slowest Yahoo call for symbols fetched within the last day. The same
+# file keeps each ticker's 2y daily history for an hour, since its last bar moves intraday.
+_DISK_CACHE_PATH = os.environ.get("APEX_YF_CACHE")
+_DISK_CACHE_TTL = 60 * 60 * 24
+_DISK_HISTORY_TTL = 60 * 60
+
+
+# Any one of these marks a payload as a real quote; _quote_price picks them in this priority order
+_PRICE_KEYS = frozenset(("currentPrice", "regularMarketPrice", "navPrice"))
+
+
+def _quote_price(data):
+    return data.get("currentPrice") or data.get("regularMarketPrice") or data.get("navPrice")
+
+
+# `.info` fields that move intraday. They are dropped from the 24h metadata cache and come from
+# cached_quote's 60s fast_info path instead.
+_QUOTE_KEYS = _PRICE_KEYS | frozenset((
+    "previousClose", "open", "dayHigh", "dayLow", "volume", "marketCap",
+    "regularMarketPreviousClose", "regularMarketOpen", "regularMarketDayHigh", "regularMarketDayLow",
+    "regularMarketVolume", "bid", "ask", "bidSize", "askSize"))
+
+# cached_quote's fast_info fields -> the `.info` names MarketData reads
+_FAST_INFO_KEYS = {"previous_close": "previousClose", "open": "open", "day_high": "dayHigh",
+                   "day_low": "dayLow", "last_volume": "volume", "market_cap": "marketCap"}
+
+
+def _static_info(data):
+    return {k: v for k, v in data.items() if k not in _QUOTE_KEYS}
+
+
+def _disk_connect():
+    conn = sqlite3.connect(_DISK_CACHE_PATH, timeout=5)
+    conn.execute("CREATE TABLE IF NOT EXISTS info (ticker TEXT PRIMARY KEY, fetched REAL, payload TEXT)")
+    conn.execute("CREATE TABLE IF NOT EXISTS history (ticker TEXT PRIMARY KEY, fetched REAL, payload TEXT)")
+    return conn
+
+
+def _disk_load(ticker):
+    """(payload, is_fresh) from the disk cache, or None. Disk errors just mean a miss."""
+    try:
+        with closing(_disk_connect()) as conn:
+            row = conn.execute("SELECT fetched, payload FROM info WHERE ticker = ?", (ticker,)).fetchone()
+    except (sqlite3.Error, OSError):
+        return None
+    if row is None:
+        return None
+    return json.loads(row[1]), time.time() - row[0] < _DISK_CACHE_TTL
+
+
+def _disk_store(ticker, data):
+    try:
+        with closing(_disk_connect()) as conn, conn:
+            conn.execute("INSERT OR REPLACE INTO info VALUES (?, ?, ?)",
+                         (ticker, time.time(), json.dumps(data, default=str)))
+    except (sqlite3.Error, OSError, TypeError, ValueError):
+        pass
+
+
+def _disk_delete(ticker):
+    try:
+        with closing(_disk_connect()) as conn, conn:
+            conn.execute("DELETE FROM info WHERE ticker = ?", (ticker,))
+            conn.execute("DELETE FROM history WHERE ticker = ?", (ticker,))
+    except (sqlite3.Error, OSError):
+        pass
+
+
+def _disk_load_history(ticker, days=730):
+    """The ticker's cached daily history frame if it is under an hour old and reaches back about
+    `days` (a week of slack for weekends and holidays), else None."""
+    try:
+        with closing(_disk_connect()) as conn:
+            row = conn.execute("SELECT fetched, payload FROM history WHERE ticker = ?", (ticker,)).fetchone()
+        if row is None or time.time() - row[0] >= _DISK_HISTORY_TTL:
+            return None
+        df = pd.read_csv(io.StringIO(row[1]), index_col='Date', parse_dates=True)
+    except (sqlite3.Error, OSError, ValueError):
+        return None
+    if df.empty or df.index[0] > pd.Timestamp.now() - pd.Timedelta(days=days - 7):
+        return None
+    return df
+
+
+def _disk_store_history(ticker, df):
+    try:
+        with closing(_disk_connect()) as conn, conn:
+            conn.execute("INSERT OR REPLACE INTO history VALUES (?, ?, ?)", (ticker, time.time(), df.to_csv()))
+    except (sqlite3.Error, OSError):
+        pass
+
+
+def _fetch_info(ticker):
+    data = yf.Ticker(ticker).info
+    price = _quote_price(data) if data else None
+    if not price:
+        return {}  # Invalid ticker; never cached
+    static = _static_info(data)
+    # The payload's own quote is fresh right now, so it seeds the 60s quote path too
+    quote = {k: data[k] for k in _QUOTE_KEYS if data.get(k) is not None}
+    quote["currentPrice"] = price
+    with _cache_lock:
+        _info_cache[ticker] = static
+        _info_last[ticker] = static
+        _price_cache[ticker] = price
+        _quote_cache[ticker] = quote
+        _quote_last[ticker] = quote
+    if _DISK_CACHE_PATH:
+        _disk_store(ticker, static)
+    return static
+
+
+def _refresh_info(ticker):
+    try:
+        _fetch_info(ticker)
+    except Exception:
+        pass  # Keep serving the stale payload; the next lookup tries again
+    finally:
+        with _cache_lock:
+            _info_refreshing.discard(ticker)
+
+
+def cached_info(ticker):
+    """`.info` metadata for a ticker (sector, names, fundamentals), cached for 24h; {} if the ticker
+    is invalid. Quote fields are left out, see cached_quote. Once an entry expires the previous
+    payload is returned while a background refresh runs."""
+    refresh = False
+    with _cache_lock:
+        data = _info_cache.get(ticker)
+        stale = _info_last.get(ticker) if data is None else None
+        if stale is not None and ticker not in _info_refreshing:
+            _info_refreshing.add(ticker)
+            refresh = True
+    if data is not None:
+        return data
+
+    if stale is None and _DISK_CACHE_PATH:
+        disk = _disk_load(ticker)
+        if disk is not None:
+            stale, fresh = disk
+            stale = _static_info(stale)  # Older files stored the whole payload
+            with _cache_lock:
+                _info_last[ticker] = stale
+                if fresh:
+                    _info_cache[ticker] = stale
+                    return stale
+                refresh = ticker not in _info_refreshing
+                _info_refreshing.add(ticker)
+
+    if stale is not None:
+        if refresh:
+            _refresh_pool.submit(_refresh_info, ticker)
+        return stale
+    return _fetch_info(ticker)
+
+
+def invalidate_ticker(ticker):
+    """Forget everything cached for a ticker, so the next lookup goes back to Yahoo."""
+    ticker = ticker.upper()
+    with _cache_lock:
+        for cache in (_info_cache, _info_last, _price_cache, _quote_cache, _quote_last, _stock_cache):
+            cache.pop(ticker, None)
+        _drop_changes(ticker)
+    if _DISK_CACHE_PATH:
+        _disk_delete(ticker)
+
+
+def _drop_changes(ticker):
+    # Caller holds _cache_lock
+    for key in [k for k in _change_cache if k.startswith(ticker + ":")]:
+        del _change_cache[key]
+
+
+def cached_price(ticker):
+    """Last traded price for a ticker, cached for 60s."""
+    with _cache_lock:
+        price = _price_cache.get(ticker)
+    if price is None:
+        price = float(yf.Ticker(ticker).fast_info['last_price'])
+        with _cache_lock:
+            _price_cache[ticker] = price
+    return price
+
+
+def _fast_field(fast_info, key):
+    try:
+        value = fast_info[key]
+    except Exception:
+        return None
+    return None if value is None or (isinstance(value, float) and np.isnan(value)) else value
+
+
+def cached_quote(ticker):
+    """Intraday quote fields for a ticker (price, previous close, open, day range, volume, market cap)
+    under their `.info` names, from fast_info and cached for 60s. Fields Yahoo can't supply are left
+    out; if the lookup fails the last good quote is returned, or the error raised if there is none."""
+    with _cache_lock:
+        quote = _quote_cache.get(ticker)
+    if quote is not None:
+        return quote
+    try:
+        fast_info = yf.Ticker(ticker).fast_info
+        quote = {"currentPrice": float(fast_info['last_price'])}
+    except Exception:
+        with _cache_lock:
+            quote = _quote_last.get(ticker)
+        if quote is None:
+            raise
+        return quote
+    for key, name in _FAST_INFO_KEYS.items():
+        value = _fast_field(fast_info, key)
+        if value is not None:
+            quote[name] = value
+    with _cache_lock:
+        _quote_cache[ticker] = quote
+        _quote_last[ticker] = quote
+        _price_cache[ticker] = quote["currentPrice"]
+    return quote
+
+
+def _market_payload(ticker):
+    """Cached metadata merged with a fresh quote, as Stock's data classes read it."""
+    data = cached_info(ticker)
+    if not data:
+        raise ValueError(f"Ticker '{ticker}' is invalid or has no market data.")
+    return dict(data, **cached_quote(ticker))
+
+
+def peek_cached_stock(ticker):
+    """The shared Stock snapshot for a ticker if one is cached and fresh, else None. Never fetches."""
+    with _cache_lock:
+        return _stock_cache.get(ticker.upper())
+
+
+def get_cached_stock(ticker, quantity=0, history_df=None):
+    """Returns a copy of the shared per-ticker Stock snapshot holding `quantity` shares.
+    On a miss, `history_df` (if given) spares the new Stock its own history download."""
+    ticker = ticker.upper()
+    with _cache_lock:
+        stock = _stock_cache.get(ticker)
+    if stock is None:
+        stock = Stock(ticker, 0, history_df=history_df)
+        with _cache_lock:
+            _stock_cache[ticker] = stock
+    return stock.with_quantity(quantity)
+
+
+def get_cached_stocks(tickers, max_workers=8):
+    """{ticker: shared Stock snapshot, or the exception raised building it}. Tickers not yet
+    cached share one batch history download and are built concurrently."""
+    tickers = list(dict.fromkeys(t.upper() for t in tickers))
+    if not tickers:
+        return {}
+    with _cache_lock:
+        missing = [t for t in tickers if t not in _stock_cache]
+    frames = download_batch(missing) if len(missing) > 1 else {}
+
+    def build(ticker):
+        try:
+            return get_cached_stock(ticker, history_df=frames.get(ticker))
+        except Exception as e:
+            return e
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(tickers))) as ex:
+        return dict(zip(tickers, ex.map(build, tickers)))
+
+
+def download_batch(tickers, period="1y", **kwargs):
+    """Download history for many tickers in one request. Returns {ticker: DataFrame}.
+    Extra keyword arguments (e.g. start/end instead of period) go straight to yf.download."""
+    tickers = sorted({t.upper() for t in tickers})
+    if not tickers:
+        return {}
+    if 'start' in kwargs:
+        period = None
+    try:
+        df = yf.download(tickers, period=period, group_by='ticker', threads=True, progress=False, **kwargs)
+    except Exception:
+        return {}
+    if df is None or df.empty:
+        return {}
+
+    frames = {}
+    if isinstance(df.columns, pd.MultiIndex):
+        available = set(df.columns.get_level_values(0))
+        for ticker in tickers:
+            if ticker not in available:
+                continue
+            sub = df[ticker].dropna(how='all')
+            if not sub.empty:
+                sub.index.name = 'Date'
+                frames[ticker] = sub
+    elif len(tickers) == 1:
+        df.index.name = 'Date'
+        frames[tickers[0]] = df
+    return frames
+
+
+def rolling_mean_std(values, window):
+    """Trailing-window mean and sample std (ddof=1) of a float array, NaN until the window fills,
+    matching pandas' rolling(window).mean()/.std() without the generic window machinery."""
+    values = np.asarray(values, dtype=np.float64)
+    if bn is not None:
+        return bn.move_mean(values, window), bn.move_std(values, window, ddof=1)
+    mean = np.full(values.shape, np.nan)
+    std = np.full(values.shape, np.nan)
+    if len(values) >= window:
+        windows = np.lib.stride_tricks.sliding_window_view(values, window)
+        mean[window - 1:] = windows.mean(axis=1)
+        std[window - 1:] = windows.std(axis=1, ddof=1)
+    return mean, std
+
+
+def ffill_columns(values):
+    """Forward-fill NaNs down each column of a 2-D float array (leading NaNs stay NaN)."""
+    values = np.asarray(values, dtype=np.float64)
+    if bn is not None:
+        return bn.push(values, axis=0)
+    rows = np.where(np.isnan(values), 0, np.arange(len(values))[:, None])
+    np.maximum.accumulate(rows, axis=0, out=rows)
+    return values[rows, np.arange(values.shape[1])]
+
+
+def price_changes(current, base):
+    """Vectorized (dollar, percent) moves from `base` to `current` for many tickers at once;
+    percent is 0 where the base price is 0."""
+    current = np.asarray(current, dtype=np.float64)
+    base = np.asarray(base, dtype=np.float64)
+    dollar = current - base
+    percent = np.divide(dollar * 100.0, base, out=np.zeros_like(dollar), where=base != 0)
+    return dollar, percent
+
+
+CHANGE_PERIODS = {"daily": 1, "monthly": 30, "six_month": 180, "yearly": 365}
 
 
 class Stock:
-    def __init__(self, ticker_symbol, quantity=1):
+    def __init__(self, ticker_symbol, quantity=1, data=None, history_df=None):
         self.ticker_symbol = ticker_symbol.upper()
         self._quantity_held = max(0, quantity)  # Ensure non-negative quantity
 
-        # 1. API CONNECTION & VALIDATION
-        ticker_obj = yf.Ticker(self.ticker_symbol)
-        try:
-            data = ticker_obj.info
-            # Check for empty data or missing price (indicates invalid ticker)
-            if not data or not any(k in data for k in ['currentPrice', 'regularMarketPrice', 'navPrice']):
-                raise ValueError(f"Ticker '{self.ticker_symbol}' is invalid or has no market data.")
-        except Exception as e:
-            raise ConnectionError(f"Failed to fetch data for {self.ticker_symbol}: {str(e)}")
+        # 1. API CONNECTION & VALIDATION (skipped when a pre-fetched quote is supplied)
+        if data is None:
+            try:
+                # Metadata may be a day old, but the quote fields are at most a minute old
+                data = _market_payload(self.ticker_symbol)
+            except Exception as e:
+                raise ConnectionError(f"Failed to fetch data for {self.ticker_symbol}: {str(e)}")
 
         # 2. DATA ENCAPSULATION WITH FALLBACKS
         self.company_info = CompanyInfo(data)
@@ -25,19 +391,86 @@ class Stock:
         self.market_data = MarketData(data)
         self.financials = Financials(data)
 
-        # 3. COMPONENT CLASSES
-        self.change = Change(self.ticker_symbol, self.market_data.current_price)
-        self.history = History(self.ticker_symbol)
+        # 3. COMPONENT CLASSES (change/history/risk_metrics are built on first access, see below)
+        self._history_df = history_df
 
-        # 4. RISK METRICS VALIDATION
+    @cached_property
+    def risk_metrics(self):
+        """RiskMetrics over the last year, or None if no history could be loaded."""
         try:
-            hist_df = self.history.yearly()
+            hist_df = self._history_df if self._history_df is not None else self.history.yearly()
             if hist_df is not None and not hist_df.empty:
-                self.risk_metrics = RiskMetrics(hist_df, self.valuation.beta)
-            else:
-                self.risk_metrics = None
+                return RiskMetrics(hist_df, self.valuation.beta)
         except Exception:
-            self.risk_metrics = None
+            pass
+        return None
+
+    @cached_property
+    def change(self):
+        return Change(self.ticker_symbol, self.market_data.current_price, self._history_df,
+                      source=lambda: self._wide_history)
+
+    @cached_property
+    def history(self):
+        return History(self.ticker_symbol, source=lambda: self._wide_history)
+
+    @cached_property
+    def _wide_history(self):
+        """One ~2y daily frame, fetched on first use, that History windows and Change both slice."""
+        if _DISK_CACHE_PATH:
+            df = _disk_load_history(self.ticker_symbol)
+            if df is not None:
+                return df
+        try:
+            df = yf.Ticker(self.ticker_symbol).history(period="2y")
+        except Exception:
+            return None
+        if df is None or df.empty:
+            return None
+        if df.index.tz is not None:
+            df.index = df.index.tz_localize(None)  # Match yf.download's naive index
+        df.index.name = 'Date'
+        if _DISK_CACHE_PATH:
+            _disk_store_history(self.ticker_symbol, df)
+        return df
+
+    @classmethod
+    def from_frame(cls, ticker_symbol, quantity, frame):
+        """Build a Stock from a download_batch() slice without any per-ticker network calls."""
+        closes = frame['Close'].dropna() if 'Close' in frame.columns else pd.Series(dtype='float64')
+        if closes.empty:
+            raise ValueError(f"Ticker '{ticker_symbol.upper()}' has no market data in the batch.")
+        data = {
+            'currentPrice': float(closes.iloc[-1]),
+            'previousClose': float(closes.iloc[-2]) if len(closes) > 1 else float(closes.iloc[-1]),
+        }
+        return cls(ticker_symbol, quantity, data=data, history_df=frame)
+
+    @classmethod
+    def bulk(cls, symbols, quantities=None, max_workers=8):
+        """Build many Stocks concurrently (the work is all Yahoo latency). Returns {ticker: Stock}
+        in input order; tickers that fail to load are skipped with a warning."""
+        symbols = [s.upper() for s in symbols]
+        quantities = [1] * len(symbols) if quantities is None else list(quantities)
+        built = {}
+        with ThreadPoolExecutor(max_workers=max_workers) as ex:
+            futures = {ex.submit(cls, sym, qty): sym for sym, qty in zip(symbols, quantities)}
+            for future in as_completed(futures):
+                sym = futures[future]
+                exc = future.exception()
+                if exc is not None:
+                    warnings.warn(f"Skipping {sym}: {exc}")
+                    continue
+                built[sym] = future.result()
+        return {sym: built[sym] for sym in symbols if sym in built}
+
+    def with_quantity(self, quantity):
+        """Shallow copy sharing this Stock's market data but holding its own quantity."""
+        # Build these before copying so every copy shares one Change/History and the 2y frame behind them
+        self.change, self.history
+        clone = copy.copy(self)
+        clone._quantity_held = max(0, quantity)
+        return clone
 
     def get_quantity_held(self):
         return self._quantity_held
@@ -47,33 +480,66 @@ class Stock:
             raise ValueError("Amount to increase must be positive.")
         self._quantity_held += amount
 
+    def _add_quantity(self, amount):
+        """Unchecked top-up for trusted callers whose amounts were validated upstream (e.g. stored holdings)."""
+        self._quantity_held += amount
+
     def decrease_quantity(self, amount):
-        if amount > self._quantity_held:
-            raise ValueError("Insufficient quantity held.")
-        if amount <= 0:
-            raise ValueError("Amount to decrease must be positive.")
+        # One chained test on the happy path; the message is only picked once we know it fails
+        if not 0 < amount <= self._quantity_held:
+            raise ValueError("Amount to decrease must be positive." if amount <= 0 else "Insufficient quantity held.")
         self._quantity_held -= amount
 
     def get_total_value(self):
         return self.market_data.current_price * self._quantity_held
 
     def refresh_data(self):
+        invalidate_ticker(self.ticker_symbol)
         try:
-            data = yf.Ticker(self.ticker_symbol).info
+            data = _market_payload(self.ticker_symbol)
             self.company_info = CompanyInfo(data)
             self.valuation = ValuationMetrics(data)
             self.market_data = MarketData(data)
             self.financials = Financials(data)
+            self.__dict__.pop('change', None)  # Rebuilt against the new price on next access
         except Exception as e:
             print(f"Refresh failed for {self.ticker_symbol}: {e}")
 
+    def refresh_price(self):
+        """Re-quote only the spot price (fast_info), instead of refresh_data's full `.info` fetch."""
+        with _cache_lock:
+            _price_cache.pop(self.ticker_symbol, None)
+            _quote_cache.pop(self.ticker_symbol, None)
+            _drop_changes(self.ticker_symbol)
+        try:
+            price = cached_price(self.ticker_symbol)
+            # market_data is shared with the cached snapshot and every with_quantity clone; rebind a copy
+            self.market_data = copy.copy(self.market_data)
+            self.market_data.current_price = price
+            self.__dict__.pop('change', None)  # Rebuilt against the new price on next access
+        except Exception as e:
+            print(f"Price refresh failed for {self.ticker_symbol}: {e}")
+
     # Gateway methods with try-except to prevent crashing during calculation
     def get_change(self, period="daily"):
         try:
             period = str(period).lower()
-            mapping = {"daily": 1, "monthly": 30, "six_month": 180, "yearly": 365}
-            days = mapping.get(period, int(period) if period.isdigit() else 1)
-            return self.change.calculate_change(days)
+            key = f"{self.ticker_symbol}:{period}"
+            with _cache_lock:
+                cached = _change_cache.get(key)
+            if cached is not None:
+                return cached
+
+            days = CHANGE_PERIODS.get(period, int(period) if period.isdigit() else 1)
+            # Fill every named period the loaded history already covers in the same pass
+            extra = {name: d for name, d in CHANGE_PERIODS.items()
+                     if d != days and self.change.covers(d)}
+            results = self.change.calculate_changes_multi((days, *extra.values()))
+            with _cache_lock:
+                _change_cache[key] = results[days]
+                for name, d in extra.items():
+                    _change_cache[f"{self.ticker_symbol}:{name}"] = results[d]
+            return results[days]
         except Exception:
             return 0.0, 0.0
 
@@ -93,121 +559,202 @@ class Stock:
             return pd.DataFrame()
 
 
+# (attribute, info key, default) per data holder. The holders read them in one
+# map(data.get, keys, defaults) pass and keep the values in __slots__ rather than a per-instance dict.
+def _fields(*spec):
+    attrs, keys, defaults = zip(*spec)
+    return attrs, keys, defaults
+
+
 class CompanyInfo:
+    _ATTRS, _KEYS, _DEFAULTS = _fields(
+        ("name", "longName", "N/A"),
+        ("sector", "sector", "N/A"),
+        ("industry", "industry", "N/A"),
+        ("phone", "phone", "N/A"),
+        ("summary", "longBusinessSummary", "No summary available."),
+        ("website", "website", "N/A"),
+        ("employees", "fullTimeEmployees", "N/A"),
+    )
+    __slots__ = _ATTRS + ("executive_board", "address")
+
     def __init__(self, data):
-        self.name = data.get("longName", "N/A")
-        self.sector = data.get("sector", "N/A")
-        self.industry = data.get("industry", "N/A")
-        self.phone = data.get("phone", "N/A")
-        self.summary = data.get("longBusinessSummary", "No summary available.")
-        self.website = data.get("website", "N/A")
-        self.employees = data.get("fullTimeEmployees", "N/A")
+        (self.name, self.sector, self.industry, self.phone,
+         self.summary, self.website, self.employees) = map(data.get, self._KEYS, self._DEFAULTS)
         self.executive_board = ExecutiveBoard(data.get("companyOfficers", []))
         self.address = Address(data)
 
 
 class ExecutiveBoard:
+    __slots__ = ("_members", "_board")
+
     def __init__(self, executive_member_data):
-        # Handle case where executive_member_data is None or empty
-        if not executive_member_data:
-            self.executive_board = []
-        else:
-            self.executive_board = [ExecutiveMember(member) for member in executive_member_data]
+        # Raw officer dicts (None or empty -> []); ExecutiveMember objects are built only when read
+        self._members = executive_member_data or []
+        self._board = None
 
+    @property
+    def executive_board(self):
+        if self._board is None:
+            self._board = [ExecutiveMember.from_info(member) for member in self._members]
+        return self._board
 
+
+@dataclass
 class ExecutiveMember:
-    def __init__(self, member):
-        self.name = member.get("name", "N/A")
-        self.title = member.get("title", "N/A")
-        self.age = member.get("age", "N/A")
-        self.pay = member.get("totalPay", "N/A")
+    # Hand-written __slots__ (no field defaults) rather than dataclass(slots=True), which needs 3.10
+    __slots__ = ("name", "title", "age", "pay")
+    name: str
+    title: str
+    age: object
+    pay: object
+
+    _KEYS = ("name", "title", "age", "totalPay")
+
+    @classmethod
+    def from_info(cls, member):
+        """Build from one entry of Yahoo's `companyOfficers` list."""
+        return cls(*map(member.get, cls._KEYS, ("N/A",) * 4))
 
 
 class Address:
+    _ATTRS, _KEYS, _DEFAULTS = _fields(
+        ("line1", "address1", "N/A"),
+        ("city", "city", "N/A"),
+        ("state", "state", "N/A"),
+        ("country", "country", "N/A"),
+        ("zip", "zip", "N/A"),
+    )
+    __slots__ = _ATTRS
+
     def __init__(self, data):
-        self.line1 = data.get("address1", "N/A")
-        self.city = data.get("city", "N/A")
-        self.state = data.get("state", "N/A")
-        self.country = data.get("country", "N/A")
-        self.zip = data.get("zip", "N/A")
+        self.line1, self.city, self.state, self.country, self.zip = map(data.get, self._KEYS, self._DEFAULTS)
 
     def __str__(self):
         return f"{self.line1}, {self.city}, {self.country}"
 
 
 class ValuationMetrics:
+    _ATTRS, _KEYS, _DEFAULTS = _fields(
+        ("pe", "trailingPE", None),
+        ("forward_pe", "forwardPE", None),
+        ("pb_ratio", "priceToBook", None),
+        ("dividend_yield", "dividendYield", 0),
+        ("beta", "beta", 1.0),  # Default to market beta
+        ("eps", "trailingEps", None),
+        ("target_mean_price", "targetMeanPrice", None),
+        ("recommendation", "recommendationKey", "N/A"),
+    )
+    __slots__ = _ATTRS
+
     def __init__(self, data):
-        self.pe = data.get("trailingPE")
-        self.forward_pe = data.get("forwardPE")
-        self.pb_ratio = data.get("priceToBook")
-        self.dividend_yield = data.get("dividendYield", 0)
-        self.beta = data.get("beta", 1.0)  # Default to market beta
-        self.eps = data.get("trailingEps")
-        self.target_mean_price = data.get("targetMeanPrice")
-        self.recommendation = data.get("recommendationKey", "N/A")
+        (self.pe, self.forward_pe, self.pb_ratio, self.dividend_yield, self.beta,
+         self.eps, self.target_mean_price, self.recommendation) = map(data.get, self._KEYS, self._DEFAULTS)
 
 
 class MarketData:
+    __slots__ = ("current_price", "previous_close", "open_price", "day_high", "day_low",
+                 "volume", "fifty_two_week_range", "market_cap", "market_cap_B")
+
     def __init__(self, data):
         # Pick the most reliable price source available
-        self.current_price = data.get("currentPrice") or data.get("regularMarketPrice") or data.get("navPrice") or 0.0
-        self.previous_close = data.get("previousClose", self.current_price)
-        self.open_price = data.get("open", self.current_price)
-        self.day_high = data.get("dayHigh", self.current_price)
-        self.day_low = data.get("dayLow", self.current_price)
+        self.current_price = price = _quote_price(data) or 0.0
+        # Price-like fields fall back to the current price
+        self.previous_close, self.open_price, self.day_high, self.day_low = map(
+            data.get, ("previousClose", "open", "dayHigh", "dayLow"), (price,) * 4)
         self.volume = data.get("volume", 0)
         self.fifty_two_week_range = data.get("fiftyTwoWeekRange", "N/A")
         self.market_cap = data.get("marketCap", 0)
+        self.market_cap_B = (self.market_cap or 0) / 1e9  # Display unit, scaled once per snapshot
 
 
 class Financials:
+    # Convert all to floats/ints or default to 0
+    _ATTRS, _KEYS, _DEFAULTS = _fields(
+        ("revenue", "totalRevenue", 0),
+        ("net_income", "netIncomeToCommon", 0),
+        ("total_cash", "totalCash", 0),
+        ("total_debt", "totalDebt", 0),
+        ("free_cash_flow", "freeCashflow", 0),
+        ("gross_margin", "grossMargins", 0),
+        ("operating_margin", "operatingMargins", 0),
+        ("return_on_equity", "returnOnEquity", 0),
+        ("return_on_assets", "returnOnAssets", 0),
+        ("debt_to_equity", "debtToEquity", 0),
+    )
+    __slots__ = _ATTRS
+
     def __init__(self, data):
-        # Convert all to floats/ints or default to 0
-        self.revenue = data.get("totalRevenue", 0)
-        self.net_income = data.get("netIncomeToCommon", 0)
-        self.total_cash = data.get("totalCash", 0)
-        self.total_debt = data.get("totalDebt", 0)
-        self.free_cash_flow = data.get("freeCashflow", 0)
-        self.gross_margin = data.get("grossMargins", 0)
-        self.operating_margin = data.get("operatingMargins", 0)
-        self.return_on_equity = data.get("returnOnEquity", 0)
-        self.return_on_assets = data.get("returnOnAssets", 0)
-        self.debt_to_equity = data.get("debtToEquity", 0)
+        (self.revenue, self.net_income, self.total_cash, self.total_debt, self.free_cash_flow,
+         self.gross_margin, self.operating_margin, self.return_on_equity, self.return_on_assets,
+         self.debt_to_equity) = map(data.get, self._KEYS, self._DEFAULTS)
 
 
 class Change:
-    def __init__(self, ticker, current_price):
+    __slots__ = ("ticker", "current_price", "history_df", "_source", "_fetched")
+
+    def __init__(self, ticker, current_price, history_df=None, source=None):
         self.ticker = ticker
         self.current_price = current_price
+        self.history_df = history_df  # Optional pre-fetched history (e.g. from download_batch)
+        self._source = source  # Optional callable returning the owning Stock's shared 2y frame
+        self._fetched = False
+
+    def _history_for(self, days):
+        hist = self.history_df
+        if (hist is None or len(hist) <= days) and not self._fetched:
+            # period="max" or "2y" is safer to ensure we find enough data. Fetched at most once;
+            # every later period is sliced from the same frame.
+            if self._source is not None:
+                hist = self._source()
+            else:
+                hist = yf.Ticker(self.ticker).history(period="2y")
+            self.history_df = hist
+            self._fetched = True
+        return hist
 
-    def calculate_change(self, days=1):
+    def covers(self, days):
+        """True if `days` can be answered without another fetch."""
+        return self._fetched or (self.history_df is not None and len(self.history_df) > days)
+
+    def calculate_changes_multi(self, day_list=(1, 30, 180, 365)):
+        """{days: (dollar, percent)} for every look-back in `day_list`, from one slice of the closes."""
         try:
-            # period="max" or "2y" is safer to ensure we find enough data
-            ticker_obj = yf.Ticker(self.ticker)
-            hist = ticker_obj.history(period="2y")
-            if hist.empty or len(hist) < 2:
-                return 0.0, 0.0
-
-            # Find the closest date available
-            idx = -min(days + 1, len(hist))
-            start_price = hist['Close'].iloc[idx]
-
-            dollar = round(float(self.current_price - start_price), 2)
-            percent = round(float((dollar / start_price) * 100), 2) if start_price != 0 else 0.0
-            return dollar, percent
+            hist = self._history_for(max(day_list))
+            if hist is None or hist.empty or len(hist) < 2:
+                return {d: (0.0, 0.0) for d in day_list}
+
+            closes = hist['Close'].to_numpy(dtype=np.float64)
+            # Closest date available for each period
+            start = closes[-np.minimum(np.asarray(day_list) + 1, len(closes))]
+            dollar, percent = price_changes(self.current_price, start)
+            return {d: (round(float(dl), 2), round(float(pc), 2)) for d, dl, pc in zip(day_list, dollar, percent)}
         except Exception:
-            return 0.0, 0.0
+            return {d: (0.0, 0.0) for d in day_list}
+
+    def calculate_change(self, days=1):
+        return self.calculate_changes_multi((days,))[days]
 
 
 class History:
-    def __init__(self, ticker):
+    # Windows up to this many days are sliced from the shared frame instead of downloaded
+    SHARED_DAYS = 730
+    __slots__ = ("ticker", "_source")
+
+    def __init__(self, ticker, source=None):
         self.ticker = ticker
+        self._source = source  # Optional callable returning the owning Stock's shared 2y frame
 
     def create_df(self, days):
+        if self._source is not None and days <= self.SHARED_DAYS:
+            wide = self._source()
+            if wide is not None:
+                start = pd.Timestamp.now() - pd.Timedelta(days=days)
+                return wide.loc[wide.index >= start]
         try:
             end = datetime.datetime.now()
             start = end - datetime.timedelta(days=days)
-            df = yf.download(self.ticker, start=start, end=end, progress=False)
+            df = yf.download(self.ticker, start=start, end=end, progress=False, threads=True)
 
             if df.empty:
                 return pd.DataFrame()
@@ -219,6 +766,26 @@ class History:
         except Exception:
             return pd.DataFrame()
 
+    @staticmethod
+    def bulk_download(tickers, days):
+        """The last `days` of history for many tickers from one batched request: {ticker: DataFrame}.
+        With APEX_YF_CACHE set, tickers whose cached frame covers the window skip the download."""
+        end = datetime.datetime.now()
+        start = end - datetime.timedelta(days=days)
+        if not _DISK_CACHE_PATH:
+            return download_batch(tickers, start=start, end=end)
+        tickers = {t.upper() for t in tickers}
+        frames = {}
+        for ticker in tickers:
+            df = _disk_load_history(ticker, days)
+            if df is not None:
+                frames[ticker] = df.loc[df.index >= pd.Timestamp(start)]
+        fetched = download_batch(tickers - frames.keys(), start=start, end=end)
+        for ticker, df in fetched.items():
+            _disk_store_history(ticker, df)
+        frames.update(fetched)
+        return frames
+
     def daily(self):
         return self.create_df(5)
 
@@ -236,6 +803,8 @@ class History:
 
 
 class RiskMetrics:
+    __slots__ = ("df", "beta", "returns")
+
     def __init__(self, history_df, beta):
         self.df = history_df
         self.beta = beta if (beta is not None and beta != 0) else 1.0
@@ -269,9 +838,10 @@ class RiskMetrics:
     def get_daily_sharpe_series(self, rf_daily=0.00016):
         if len(self.returns) < 20:
             return pd.Series(dtype='float64')
-        rolling_return = self.returns.rolling(window=20).mean()
-        rolling_std = self.returns.rolling(window=20).std()
+        rolling_return, rolling_std = rolling_mean_std(self.returns.to_numpy(dtype=np.float64), 20)
 
-        # Avoid division by zero in series
-        daily_sharpe = (rolling_return - rf_daily) / rolling_std.replace(0, np.inf)
-        return daily_sharpe.replace([np.inf, -np.inf], 0).dropna()
\ No newline at end of file
+        # Zero-volatility windows score 0; the warm-up rows stay NaN and are dropped below
+        rolling_return -= rf_daily
+        daily_sharpe = np.divide(rolling_return, rolling_std, out=np.zeros_like(rolling_return),
+                                 where=rolling_std != 0)
+        return pd.Series(daily_sharpe, index=self.returns.index).replace([np.inf, -np.inf], 0).dropna()
\ No newline at end of file
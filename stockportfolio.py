@@ -1,27 +1,89 @@
-from stock import Stock
+from concurrent.futures import ThreadPoolExecutor
+import functools
+from stock import Stock, History, get_cached_stock, get_cached_stocks, rolling_mean_std, ffill_columns
 import pandas as pd
 import numpy as np
 
+# detailed_summary layout, built once at import
+_RULE = "=" * 85 + "\n"
+_DIVIDER = "-" * 85 + "\n"
+_COLUMNS = f"{'Ticker':<8}{'Company':<30}{'Qty':<10}{'Price ($)':<15}{'Value ($)':<15}\n"
+_ROW = "{:<8}{:<30}{:<10}{:<15,.2f}{:<15,.2f}\n".format
+
+
+def _summary_row(stock, price, value):
+    try:
+        name = stock.company_info.name
+        if len(name) > 30:
+            name = name[:28] + '..'
+        return _ROW(stock.ticker_symbol, name, stock.get_quantity_held(), price, value)
+    except Exception:
+        return ""  # Skip rows with unformattable data
+
 
 class StockPortfolio:
     def __init__(self, name="My Portfolio"):
         self.name = name
         self.stocks = {}  # {ticker: Stock object}
+        # ((generation, days, holdings), frame) from the last get_portfolio_history
+        self._history_cache = None
+        # Value/sector/history results are cached per generation (plus holding count); every mutator
+        # below, and refresh_all_data, bumps it. Call invalidate_cache() after changing a held Stock directly.
+        self._generation = 0
+        self._value_cache = None
+        self._sector_cache = None
+
+    def invalidate_cache(self):
+        self._generation += 1
+
+    def _cache_key(self):
+        return self._generation, len(self.stocks)
 
     def add_stock(self, ticker_symbol, quantity=1):
         """Add a Stock object with error catching for invalid tickers."""
+        self.invalidate_cache()
         try:
             ticker = ticker_symbol.upper()
             if ticker in self.stocks:
                 self.stocks[ticker].increase_quantity(quantity)
             else:
                 # This will trigger the ValueError in Stock.__init__ if ticker is fake
-                self.stocks[ticker] = Stock(ticker, quantity)
+                self.stocks[ticker] = get_cached_stock(ticker, quantity)
         except Exception as e:
             print(f"Failed to add {ticker_symbol}: {e}")
             raise  # Re-raise so the Frontend can show an error message
 
+    def add_stocks(self, holdings, max_workers=8):
+        """Add many {ticker: quantity} positions, building the new Stocks concurrently.
+        Returns {ticker: error} for the ones that failed; the rest are added."""
+        self.invalidate_cache()
+        items = [(t.upper(), q) for t, q in dict(holdings).items()]
+        new = [t for t, _ in items if t not in self.stocks]
+        failed = {}
+        built = get_cached_stocks(new, max_workers=max_workers)
+        for ticker, quantity in items:
+            result = built.get(ticker)
+            if isinstance(result, Exception):
+                print(f"Failed to add {ticker}: {result}")
+                failed[ticker] = result
+            elif result is not None:
+                self.stocks[ticker] = result.with_quantity(quantity)
+            else:
+                self.stocks[ticker].increase_quantity(quantity)
+        return failed
+
+    def add_stock_from_frame(self, ticker_symbol, quantity, frame):
+        """Add a Stock from a pre-fetched history slice (see stock.download_batch)."""
+        self.invalidate_cache()
+        ticker = ticker_symbol.upper()
+        if ticker in self.stocks:
+            # Quantities here come from stored holdings, which were validated when written
+            self.stocks[ticker]._add_quantity(quantity)
+        else:
+            self.stocks[ticker] = Stock.from_frame(ticker, quantity, frame)
+
     def sell_stock(self, ticker_symbol, quantity):
+        self.invalidate_cache()
         ticker = ticker_symbol.upper()
         if ticker not in self.stocks:
             raise KeyError(f"Ticker {ticker} not found in portfolio.")
@@ -33,63 +95,111 @@ class StockPortfolio:
         except ValueError as e:
             raise ValueError(f"Transaction failed: {e}")
 
+    def remove_stock(self, ticker_symbol):
+        ticker = ticker_symbol.upper()
+        if ticker not in self.stocks:
+            raise KeyError(f"Ticker {ticker} not found in portfolio.")
+        self.invalidate_cache()
+        del self.stocks[ticker]
+
+    def _fetch_parallel(self, fn, max_workers=8):
+        """Runs fn(stock) for every holding on a thread pool (the work is Yahoo I/O): {ticker: result}."""
+        if not self.stocks:
+            return {}
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(self.stocks))) as ex:
+            return dict(zip(self.stocks.keys(), ex.map(fn, self.stocks.values())))
+
+    def refresh_all_data(self):
+        """Re-download every holding's quote and metadata concurrently."""
+        self.invalidate_cache()
+        self._fetch_parallel(lambda stock: stock.refresh_data())
+
+    def _holdings_arrays(self):
+        """(prices, quantities) as float arrays in self.stocks order, read in one pass per field."""
+        n = len(self.stocks)
+        stocks = self.stocks.values()
+        prices = np.fromiter((s.market_data.current_price for s in stocks), dtype=np.float64, count=n)
+        qtys = np.fromiter((s.get_quantity_held() for s in stocks), dtype=np.float64, count=n)
+        return prices, qtys
+
+    @property
+    def portfolio_value(self):
+        """Total value, recomputed only after the holdings change."""
+        key = self._cache_key()
+        if self._value_cache is None or self._value_cache[0] != key:
+            if not self.stocks:
+                value = 0.0
+            else:
+                prices, qtys = self._holdings_arrays()
+                value = float(prices @ qtys)
+            self._value_cache = (key, value)
+        return self._value_cache[1]
+
     def get_portfolio_value(self):
         """Safe calculation of total value."""
-        if not self.stocks:
-            return 0.0
-        return sum(stock.get_total_value() for stock in self.stocks.values())
+        return self.portfolio_value
 
     def holding_by_sector(self):
         """Calculates sector distribution with ZeroDivision protection."""
+        key = self._cache_key()
+        if self._sector_cache is None or self._sector_cache[0] != key:
+            self._sector_cache = (key, self._compute_sectors())
+        return dict(self._sector_cache[1])
+
+    def _compute_sectors(self):
         if not self.stocks:
             return {}
 
-        sector_value_dict = {}
-        total_value = self.get_portfolio_value()
+        prices, qtys = self._holdings_arrays()
+        values = prices * qtys
+        total_value = values.sum()
 
         if total_value == 0:
             return {stock.company_info.sector: 0.0 for stock in self.stocks.values()}
 
-        for stock in self.stocks.values():
-            sector = stock.company_info.sector or "Unknown"
-            value = stock.get_total_value()
-            sector_value_dict[sector] = sector_value_dict.get(sector, 0) + value
+        # Group-by-sector as unique + weighted bincount instead of a dict accumulation loop
+        sectors, inverse = np.unique([s.company_info.sector or "Unknown" for s in self.stocks.values()],
+                                     return_inverse=True)
+        sector_values = np.bincount(inverse, weights=values)
 
         # Convert to percentages
-        return {k: round((v / total_value) * 100, 2) for k, v in sector_value_dict.items()}
+        return {str(k): round(float(v / total_value * 100), 2) for k, v in zip(sectors, sector_values)}
 
     def get_portfolio_history(self, days=365):
         """
-        Merges histories. Uses 'outer' join to prevent missing data in one stock
-        from deleting the entire portfolio's history.
+        Daily portfolio value from one batched download. Closes are aligned on the union of the
+        tickers' dates (gaps carried forward, days before a listing count as 0) so missing data in
+        one stock can't delete the entire portfolio's history, then dotted with the quantities.
         """
         if not self.stocks:
             return pd.DataFrame(columns=['TotalValue'])
 
-        combined_df = pd.DataFrame()
+        key = (self._generation, days, tuple((t, s.get_quantity_held()) for t, s in self.stocks.items()))
+        if self._history_cache is not None and self._history_cache[0] == key:
+            return self._history_cache[1]
 
-        for ticker, stock in self.stocks.items():
-            try:
-                # Fetch history and handle potential Empty DataFrames
-                hist_data = stock.history.get_days(days)
-                if hist_data.empty:
-                    continue
-
-                prices = hist_data['Close']
-                if isinstance(prices, pd.DataFrame):
-                    prices = prices.iloc[:, 0]
-
-                stock_value_series = prices * stock.get_quantity_held()
-
-                if combined_df.empty:
-                    combined_df['TotalValue'] = stock_value_series
-                else:
-                    combined_df['TotalValue'] = combined_df['TotalValue'].add(stock_value_series, fill_value=0)
-            except Exception as e:
-                print(f"Warning: Could not include {ticker} in history: {e}")
+        frames = History.bulk_download(list(self.stocks), days)
+        tickers = []
+        for ticker in self.stocks:
+            frame = frames.get(ticker)
+            if frame is None or frame.empty or 'Close' not in frame.columns:
+                print(f"Warning: Could not include {ticker} in history: no data returned")
                 continue
+            tickers.append(ticker)
+        if not tickers:
+            return pd.DataFrame(columns=['TotalValue'])
 
-        return combined_df.sort_index().ffill().dropna()
+        dates = functools.reduce(np.union1d, (frames[t].index.values for t in tickers))
+        prices = np.full((len(dates), len(tickers)), np.nan)
+        for j, t in enumerate(tickers):
+            close = frames[t]['Close']
+            prices[np.searchsorted(dates, close.index.values), j] = close.to_numpy(dtype=np.float64)
+        prices = ffill_columns(prices)
+        prices[np.isnan(prices)] = 0
+        qty = np.array([self.stocks[t].get_quantity_held() for t in tickers], dtype=np.float64)
+        history = pd.DataFrame({'TotalValue': prices @ qty}, index=pd.DatetimeIndex(dates, name='Date'))
+        self._history_cache = (key, history)
+        return history
 
     def get_risk_reward_data(self):
         """Safe compilation of risk metrics for scatter plots."""
@@ -119,15 +229,19 @@ class StockPortfolio:
             if portfolio_history.empty or len(portfolio_history) < 20:
                 return pd.Series(dtype='float64')
 
-            port_returns = portfolio_history['TotalValue'].pct_change().fillna(0)
+            values = portfolio_history['TotalValue'].to_numpy(dtype=np.float64)
+            port_returns = np.zeros_like(values)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                port_returns[1:] = values[1:] / values[:-1] - 1
             rf_daily = 0.04 / 252
 
-            rolling_mu = port_returns.rolling(window=20).mean()
-            rolling_sigma = port_returns.rolling(window=20).std()
+            rolling_mu, rolling_sigma = rolling_mean_std(port_returns, 20)
 
-            # Replace 0 sigma with NaN to avoid division by zero, then fill with 0
-            daily_sharpe = (rolling_mu - rf_daily) / rolling_sigma.replace(0, np.nan)
-            return daily_sharpe.fillna(0).dropna()
+            # Zero-volatility and warm-up (NaN sigma) windows are left at 0
+            rolling_mu -= rf_daily
+            daily_sharpe = np.divide(rolling_mu, rolling_sigma, out=np.zeros_like(rolling_mu),
+                                     where=rolling_sigma > 0)
+            return pd.Series(daily_sharpe, index=portfolio_history.index)
         except Exception as e:
             print(f"Daily Sharpe calculation error: {e}")
             return pd.Series(dtype='float64')
@@ -137,27 +251,8 @@ class StockPortfolio:
         if not self.stocks:
             return f"Portfolio '{self.name}' is currently empty."
 
-        header = f"\n{'=' * 85}\nPORTFOLIO SUMMARY: {self.name}\n{'=' * 85}\n"
-        columns = f"{'Ticker':<8}{'Company':<30}{'Qty':<10}{'Price ($)':<15}{'Value ($)':<15}\n"
-        divider = "-" * 85 + "\n"
-
-        lines = [header, columns, divider]
-
-        for stock in self.stocks.values():
-            try:
-                name = (stock.company_info.name[:28] + '..') if len(
-                    stock.company_info.name) > 30 else stock.company_info.name
-                lines.append(
-                    f"{stock.ticker_symbol:<8}"
-                    f"{name:<30}"
-                    f"{stock.get_quantity_held():<10}"
-                    f"{stock.market_data.current_price:<15,.2f}"
-                    f"{stock.get_total_value():<15,.2f}\n"
-                )
-            except Exception:
-                continue
-
-        lines.append(divider)
-        lines.append(f"TOTAL PORTFOLIO VALUE: ${self.get_portfolio_value():,.2f}\n")
-        lines.append('=' * 85 + "\n")
-        return "".join(lines)
\ No newline at end of file
+        prices, qtys = self._holdings_arrays()
+        rows = "".join(_summary_row(stock, price, value)
+                       for stock, price, value in zip(self.stocks.values(), prices, prices * qtys))
+        return (f"\n{_RULE}PORTFOLIO SUMMARY: {self.name}\n{_RULE}{_COLUMNS}{_DIVIDER}{rows}{_DIVIDER}"
+                f"TOTAL PORTFOLIO VALUE: ${self.portfolio_value:,.2f}\n{_RULE}")
@@ -0,0 +1,113 @@
+import datetime
+import os
+import tempfile
+import pytest
+from sqlalchemy import event
+
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'test.db')
+
+from app import app, db, init_db, User, Portfolio, Holding, hash_password
+
+
+@pytest.fixture
+def client():
+    app.config.update(TESTING=True)
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        db.session.add(User(email="tester@apex.io", password=hash_password("secret")))
+        db.session.commit()
+    # Not used as a context manager: each request pushes and pops its own contexts
+    client = app.test_client()
+    client.post('/login', data={'email': 'tester@apex.io', 'password': 'secret'})
+    return client
+
+
+def add_portfolios(count, holdings=3):
+    # Fresh valuation snapshots, so the dashboard reads totals off the rows instead of calling Yahoo
+    with app.app_context():
+        user = User.query.filter_by(email="tester@apex.io").first()
+        for i in range(count):
+            p = Portfolio(name=f"P{i}", user_id=user.id, cached_total=100.0, cached_at=datetime.datetime.now())
+            p.holdings = [Holding(ticker=f"T{i}{j}", quantity=1) for j in range(holdings)]
+            db.session.add(p)
+        db.session.commit()
+
+
+def count_dashboard_selects(client):
+    with app.app_context():
+        engine = db.engine
+    selects = []
+
+    def _count(conn, cursor, statement, *args):
+        if statement.lstrip().upper().startswith("SELECT"):
+            selects.append(statement)
+
+    event.listen(engine, "before_cursor_execute", _count)
+    try:
+        response = client.get('/dashboard')
+        assert response.status_code == 200
+        response.get_data()  # The dashboard is streamed; drain it while counting
+    finally:
+        event.remove(engine, "before_cursor_execute", _count)
+    return len(selects)
+
+
+def test_dashboard_query_count_is_bounded(client):
+    """User + portfolios and all holdings load in at most two SELECTs, however many portfolios there are."""
+    add_portfolios(1)
+    assert count_dashboard_selects(client) <= 2
+    add_portfolios(4)
+    assert count_dashboard_selects(client) <= 2
+
+
+def test_init_db_upgrades_old_schema():
+    # The tables as an older release created them: no snapshot columns, no unique (portfolio, ticker)
+    with app.app_context():
+        db.drop_all()
+        with db.engine.begin() as conn:
+            conn.exec_driver_sql("CREATE TABLE user (id INTEGER PRIMARY KEY, email VARCHAR(150) NOT NULL UNIQUE,"
+                                 " password VARCHAR(300) NOT NULL)")
+            conn.exec_driver_sql("CREATE TABLE portfolio (id INTEGER PRIMARY KEY, name VARCHAR(100) NOT NULL,"
+                                 " user_id INTEGER NOT NULL REFERENCES user (id))")
+            conn.exec_driver_sql("CREATE TABLE holding (id INTEGER PRIMARY KEY, ticker VARCHAR(10) NOT NULL,"
+                                 " quantity FLOAT NOT NULL, portfolio_id INTEGER NOT NULL REFERENCES portfolio (id))")
+            conn.exec_driver_sql("INSERT INTO user VALUES (1, 'old@apex.io', 'x')")
+            conn.exec_driver_sql("INSERT INTO portfolio VALUES (1, 'Old', 1)")
+            conn.exec_driver_sql("INSERT INTO holding VALUES (1, 'AAPL', 2, 1), (2, 'MSFT', 1, 1), (3, 'AAPL', 3, 1)")
+
+        init_db()
+        init_db()  # Idempotent
+
+        assert db.session.get(Portfolio, 1).cached_at is None
+        assert [(h.ticker, h.quantity) for h in Holding.query.order_by(Holding.id)] == [('AAPL', 5.0), ('MSFT', 1.0)]
+
+
+def test_blank_initialize_flashes_once(client):
+    """A blank single-ticker submit is rejected with a message, shown on the next dashboard only."""
+    response = client.post('/initialize_portfolio', data={'name': 'Empty', 'ticker': '', 'quantity': ''})
+    assert response.status_code == 302
+    first = client.get('/dashboard').get_data(as_text=True)
+    assert "enter a ticker and quantity" in first
+    # The dashboard is streamed; the flash must still be cleared from the session cookie
+    assert "enter a ticker and quantity" not in client.get('/dashboard').get_data(as_text=True)
+    with app.app_context():
+        assert Portfolio.query.count() == 0
+
+
+def test_failed_logins_are_rate_limited(client):
+    """Past five failed logins in the window, further POSTs get a 429 without checking the password."""
+    # Own address, so this bucket doesn't lock out the other tests' logins
+    env = {'REMOTE_ADDR': '10.0.0.7'}
+    statuses = [client.post('/login', data={'email': 'tester@apex.io', 'password': 'wrong'},
+                            environ_base=env).status_code for _ in range(6)]
+    assert statuses == [200] * 5 + [429]
+    response = client.post('/login', data={'email': 'tester@apex.io', 'password': 'secret'}, environ_base=env)
+    assert response.status_code == 429
+
+
+def test_successful_logins_are_not_rate_limited(client):
+    env = {'REMOTE_ADDR': '10.0.0.8'}
+    for _ in range(7):
+        response = client.post('/login', data={'email': 'tester@apex.io', 'password': 'secret'}, environ_base=env)
+        assert response.status_code == 302
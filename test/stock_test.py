@@ -1,5 +1,8 @@
+import numpy as np
+import pandas as pd
 import pytest
-from stock import Stock
+import stock
+from stock import Stock, rolling_mean_std, ffill_columns, price_changes
 
 def test_invalid_ticker():
     """Ensure fake tickers raise a ConnectionError or ValueError."""
@@ -26,4 +29,46 @@ def test_zero_beta_handling():
     s = Stock("AAPL")
     s.valuation.beta = 0
     # This should return 0.0 because of our error handling, not crash
-    assert s.risk_metrics.get_treynor_ratio() == 0.0
\ No newline at end of file
+    assert s.risk_metrics.get_treynor_ratio() == 0.0
+
+@pytest.fixture(params=["bottleneck", "numpy"])
+def numeric_backend(request, monkeypatch):
+    """Runs the numeric helper tests once through bottleneck and once through the numpy fallback."""
+    if request.param == "bottleneck":
+        monkeypatch.setattr(stock, "bn", pytest.importorskip("bottleneck"))
+    else:
+        monkeypatch.setattr(stock, "bn", None)
+    return request.param
+
+def test_rolling_mean_std_matches_pandas(numeric_backend):
+    """NaN during the warm-up and around a gap, sample std (ddof=1), like rolling().mean()/std()."""
+    values = np.array([10.0, 11.5, 9.0, 12.0, np.nan, 13.0, 12.5, 14.0, 15.5, 15.0, 16.0, 14.5])
+    mean, std = rolling_mean_std(values, 3)
+    rolling = pd.Series(values).rolling(3)
+    np.testing.assert_allclose(mean, rolling.mean().to_numpy(), equal_nan=True)
+    np.testing.assert_allclose(std, rolling.std(ddof=1).to_numpy(), equal_nan=True)
+    assert np.isnan(mean[:2]).all() and np.isnan(std[:2]).all()
+
+def test_rolling_mean_std_shorter_than_window(numeric_backend):
+    mean, std = rolling_mean_std([1.0, 2.0], 5)
+    assert np.isnan(mean).all() and np.isnan(std).all()
+
+def test_ffill_columns_matches_pandas(numeric_backend):
+    """Gaps are carried forward per column; a column's leading NaNs stay NaN."""
+    values = np.array([[1.0, np.nan, np.nan],
+                       [np.nan, 2.0, np.nan],
+                       [3.0, np.nan, np.nan],
+                       [np.nan, np.nan, 4.0],
+                       [np.nan, 5.0, np.nan]])
+    expected = pd.DataFrame(values).ffill().to_numpy()
+    np.testing.assert_array_equal(ffill_columns(values), expected)
+
+def test_price_changes():
+    """Dollar and percent moves per ticker, with 0% where the base price is 0."""
+    dollar, percent = price_changes([110.0, 45.0, 7.0], [100.0, 50.0, 0.0])
+    np.testing.assert_allclose(dollar, [10.0, -5.0, 7.0])
+    np.testing.assert_allclose(percent, [10.0, -10.0, 0.0])
+    # A scalar current price against many bases, as Change.calculate_changes_multi uses it
+    dollar, percent = price_changes(120.0, np.array([100.0, 150.0]))
+    np.testing.assert_allclose(dollar, [20.0, -30.0])
+    np.testing.assert_allclose(percent, [20.0, -20.0])
@@ -1,6 +1,15 @@
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import matplotlib
+matplotlib.use('Agg')  # Charts are only ever rendered to image buffers, never shown in a window
 import matplotlib.pyplot as plt
-import mplfinance as mpf
+from matplotlib.colors import to_rgba
+from matplotlib.figure import Figure
+import numpy as np
 import pandas as pd
+from cachetools import TTLCache
+from stock import rolling_mean_std
 
 def apply_dark_style():
     """Applies NovaFinance Dark Theme to all Matplotlib plots."""
@@ -13,74 +22,181 @@ def apply_dark_style():
         'text.color': 'white'
     })
 
+# Applied once at import; every Figure built below picks the theme up from rcParams
+apply_dark_style()
+
+# Custom candle style for the volatility chart, built on first use rather than per render
+@functools.lru_cache(maxsize=None)
+def _volatility_style():
+    import mplfinance as mpf
+    return mpf.make_mpf_style(
+        base_mpl_style='dark_background', facecolor='#1e293b',
+        marketcolors=mpf.make_marketcolors(up='#10b981', down='#ef4444', inherit=True))
+
+# One Figure per chart kind per thread, cleared and rebuilt for each render. Callers turn a chart
+# into bytes (see app.get_plot_bytes) before building the next one of the same kind on that thread.
+_figures = threading.local()
+
+# Fixed margins per chart kind; the figure sizes never change, so there is nothing for a
+# tight-layout pass to measure on each render
+_LAYOUTS = {
+    'benchmark': dict(left=0.06, right=0.98, top=0.93, bottom=0.08),
+    'price_volume': dict(left=0.07, right=0.98, top=0.94, bottom=0.06, hspace=0.05),
+    'volatility': dict(left=0.06, right=0.97, top=0.93, bottom=0.14),  # Room for mplfinance's slanted dates
+}
+
+def _figure(kind, figsize):
+    fig = getattr(_figures, kind, None)
+    if fig is None:
+        fig = Figure(figsize=figsize)
+        setattr(_figures, kind, fig)
+    else:
+        fig.clf()
+    fig.subplots_adjust(**_LAYOUTS[kind])
+    return fig
+
+# mpf.plot runs inside plt.rc_context(), which snapshots and restores the global rcParams even when
+# it draws on our own axes, so calls into it are serialized
+_mpf_lock = threading.Lock()
+
+# Benchmark closes keyed (ticker, start date, end date); every portfolio spanning the same dates
+# shares one download
+_benchmark_cache = TTLCache(maxsize=64, ttl=60 * 60)
+_benchmark_lock = threading.Lock()
+
+def benchmark_closes(ticker, start, end):
+    """Daily closes for a benchmark between two dates, or None if Yahoo returned nothing."""
+    key = (ticker, pd.Timestamp(start).date(), pd.Timestamp(end).date())
+    with _benchmark_lock:
+        closes = _benchmark_cache.get(key)
+    if closes is not None:
+        return closes
+    import yfinance as yf
+    df = yf.download(ticker, start=start, end=end, progress=False)
+    if df.empty:
+        return None
+    closes = df['Close']
+    if isinstance(closes, pd.DataFrame):  # Newer yfinance keeps a ticker level on the columns
+        closes = closes.iloc[:, 0]
+    closes = closes.dropna()  # Gaps resolve to the previous close when aligned to portfolio dates
+    if closes.empty:
+        return None
+    with _benchmark_lock:
+        _benchmark_cache[key] = closes
+    return closes
+
+def fetch_benchmarks(tickers, start, end):
+    """{ticker: closes or None} for several benchmarks, downloaded concurrently."""
+    def fetch(ticker):
+        try:
+            return benchmark_closes(ticker, start, end)
+        except Exception:
+            return None
+    if len(tickers) == 1:
+        return {tickers[0]: fetch(tickers[0])}
+    with ThreadPoolExecutor(max_workers=min(8, len(tickers))) as ex:
+        return dict(zip(tickers, ex.map(fetch, tickers)))
+
+# Legend names for common benchmarks, and the line styles successive benchmarks cycle through
+BENCHMARK_NAMES = {'^GSPC': 'S&P 500', '^IXIC': 'NASDAQ', '^DJI': 'Dow Jones', '^RUT': 'Russell 2000'}
+_BENCHMARK_STYLES = (('#94a3b8', '--'), ('#f59e0b', ':'), ('#a855f7', '-.'))
+
+# Up/down volume bar colours as RGBA rows (alpha included), so bars need no per-bar colour parsing
+_VOLUME_UP = np.array(to_rgba('#10b981', 0.5))
+_VOLUME_DOWN = np.array(to_rgba('#ef4444', 0.5))
+
+def bollinger_bands(close, window=20, width=2):
+    """(sma, upper, lower) arrays for a close series, NaN until the window fills."""
+    sma, std = rolling_mean_std(close, window)
+    std *= width
+    return sma, sma + std, sma - std
+
 class PortfolioVisuals:
     def __init__(self, data):
         self.data = data
 
     def create_benchmark_comparison(self, benchmark_ticker="^GSPC"):
-        apply_dark_style()
+        """Returns a Figure, or None when there is nothing to plot. `benchmark_ticker` may also be
+        a list of tickers, fetched concurrently and drawn as one line each."""
         if self.data is None or self.data.empty or 'TotalValue' not in self.data.columns:
-            return
+            return None
         try:
-            import yfinance as yf
+            tickers = [benchmark_ticker] if isinstance(benchmark_ticker, str) else list(benchmark_ticker)
             port_hist = self.data['TotalValue']
-            bench_df = yf.download(benchmark_ticker, start=port_hist.index.min(), end=port_hist.index.max(), progress=False)
-            if bench_df.empty: return
-            bench = bench_df['Close'].reindex(port_hist.index).ffill()
-            port_norm = (port_hist / port_hist.iloc[0]) * 100
-            bench_norm = (bench / bench.iloc[0]) * 100
-            plt.figure(figsize=(12, 6))
-            plt.plot(port_norm.index, port_norm, label='Portfolio', color='#3b82f6', linewidth=2)
-            plt.plot(bench_norm.index, bench_norm, label='S&P 500', color='#94a3b8', linestyle='--')
-            plt.title(f"Portfolio vs {benchmark_ticker} (Growth of $100)")
-            plt.legend()
-            plt.grid(True, alpha=0.1)
-        except Exception: pass
+            benches = {t: c for t, c in fetch_benchmarks(tickers, port_hist.index.min(), port_hist.index.max()).items()
+                       if c is not None}
+            if not benches: return None
+            port_norm = port_hist.to_numpy(dtype=np.float64, copy=True)
+            port_norm *= 100.0 / port_norm[0]
+            dates = port_hist.index.values.astype('datetime64[ns]')
+            # A standalone Figure never touches pyplot's global figure registry, so renders can run in parallel
+            fig = _figure('benchmark', (12, 6))
+            ax = fig.subplots()
+            ax.plot(port_hist.index, port_norm, label='Portfolio', color='#3b82f6', linewidth=2)
+            for i, (ticker, bench) in enumerate(benches.items()):
+                # Last benchmark close on or before each portfolio date (the first close before it starts)
+                pos = np.searchsorted(bench.index.values.astype('datetime64[ns]'), dates, side='right') - 1
+                bench_norm = bench.to_numpy(dtype=np.float64)[np.clip(pos, 0, len(bench) - 1)]  # Gather is a fresh array
+                bench_norm *= 100.0 / bench_norm[0]
+                color, linestyle = _BENCHMARK_STYLES[i % len(_BENCHMARK_STYLES)]
+                ax.plot(port_hist.index, bench_norm, label=BENCHMARK_NAMES.get(ticker, ticker),
+                        color=color, linestyle=linestyle)
+            ax.set_title(f"Portfolio vs {', '.join(benches)} (Growth of $100)")
+            ax.legend()
+            ax.grid(True, alpha=0.1)
+            return fig
+        except Exception:
+            return None
 
 class StockVisuals:
     def __init__(self, data):
         self.data = data
 
     def create_volatility_chart(self, ticker="Stock"):
-        """Neat and tidy Bollinger Bands with shaded volatility areas."""
-        apply_dark_style()
+        """Neat and tidy Bollinger Bands with shaded volatility areas. Returns a Figure or None."""
         if self.data is None or self.data.empty or 'Close' not in self.data.columns or len(self.data) < 20:
-            return
+            return None
 
         try:
-            df = self.data.copy()
-            df['SMA'] = df['Close'].rolling(window=20).mean()
-            df['STD'] = df['Close'].rolling(window=20).std()
-            df['Upper'] = df['SMA'] + (df['STD'] * 2)
-            df['Lower'] = df['SMA'] - (df['STD'] * 2)
-            df = df.dropna()
-
-            # Custom Style for clean look
-            mc = mpf.make_marketcolors(up='#10b981', down='#ef4444', inherit=True)
-            s  = mpf.make_mpf_style(base_mpl_style='dark_background', facecolor='#1e293b', marketcolors=mc)
+            # mplfinance is only needed here, so importing visuals doesn't pay for it
+            import mplfinance as mpf
+            # Bands stay as arrays next to the OHLC columns; the caller's frame is never copied or written to
+            ohlc = self.data[['Open', 'High', 'Low', 'Close']]
+            sma, upper, lower = bollinger_bands(ohlc['Close'].to_numpy(dtype=np.float64))
+            keep = ~np.isnan(sma) & ohlc.notna().all(axis=1).to_numpy()
+            df, sma, upper, lower = ohlc[keep], sma[keep], upper[keep], lower[keep]
 
+            # Drawn on our own thread-local Figure (mplfinance's external-axes mode), so pyplot's figure
+            # manager and the style's global rcParams are never touched
+            fig = _figure('volatility', (12, 7))
+            ax = fig.subplots()
             apds = [
-                mpf.make_addplot(df['Upper'], color='#f59e0b', width=0.8, alpha=0.5),
-                mpf.make_addplot(df['Lower'], color='#f59e0b', width=0.8, alpha=0.5),
-                mpf.make_addplot(df['SMA'], color='#3b82f6', width=0.8, linestyle='dashed')
+                mpf.make_addplot(upper, ax=ax, color='#f59e0b', width=0.8, alpha=0.5),
+                mpf.make_addplot(lower, ax=ax, color='#f59e0b', width=0.8, alpha=0.5),
+                mpf.make_addplot(sma, ax=ax, color='#3b82f6', width=0.8, linestyle='dashed')
             ]
-
-            mpf.plot(df, type='candle', style=s, addplot=apds,
-                     fill_between=dict(y1=df['Lower'].values, y2=df['Upper'].values, color='#f59e0b', alpha=0.05),
-                     title=f"{ticker} Volatility Terminal",
-                     ylabel='Price (USD)', tight_layout=True, figratio=(12, 7))
-        except Exception: pass
+            with _mpf_lock:
+                mpf.plot(df, ax=ax, type='candle', style=_volatility_style(), addplot=apds, ylabel='Price (USD)')
+            # fill_between isn't available with external axes; candles sit at x = 0..n-1
+            ax.fill_between(np.arange(len(df)), lower, upper, color='#f59e0b', alpha=0.05)
+            ax.set_title(f"{ticker} Volatility Terminal")
+            return fig
+        except Exception:
+            return None
 
     def create_price_volume_line_chart(self, ticker="Stock"):
-        apply_dark_style()
+        """Returns a Figure, or None when there is nothing to plot."""
         if self.data is None or self.data.empty or 'Close' not in self.data.columns:
-            return
+            return None
         try:
-            df = self.data.copy()
-            fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(12, 8), sharex=True, gridspec_kw={'height_ratios': [3, 1]})
-            ax1.plot(df.index, df['Close'], color='#3b82f6')
+            df = self.data  # Read-only here, so no defensive copy
+            fig = _figure('price_volume', (12, 8))
+            ax1, ax2 = fig.subplots(2, 1, sharex=True, gridspec_kw={'height_ratios': [3, 1]})
+            close = df['Close'].to_numpy(dtype=np.float64)
+            ax1.plot(df.index, close, color='#3b82f6')
             ax1.set_title(f"{ticker} Performance")
-            diff = df['Close'].diff().fillna(0)
-            colors = ['#10b981' if d >= 0 else '#ef4444' for d in diff]
-            ax2.bar(df.index, df['Volume'], color=colors, alpha=0.5)
-        except Exception: pass
\ No newline at end of file
+            colors = np.where((np.diff(close, prepend=close[0]) >= 0)[:, None], _VOLUME_UP, _VOLUME_DOWN)
+            ax2.bar(df.index, df['Volume'].to_numpy(), color=colors)
+            return fig
+        except Exception:
+            return None